@@ -1,17 +1,22 @@
 from aqt import mw
 from aqt.qt import QAction, QMenu, QKeySequence
-from .main import LofiWindow
-from .settings import LofiSettingsDialog
-from .reload_utils import reload_modules
+
+# Only the menu and the deck widget hook are set up at startup. The window, dialogs and
+# their web engine setup are imported on first use to keep Anki's launch fast.
 
 def show_lofi():
-    if not hasattr(mw, "lofi_window"):
-        mw.lofi_window = LofiWindow(mw)
-    mw.lofi_window.show()
-    mw.lofi_window.activateWindow()
+    from .perf_log import span
+    with span("show_lofi", first_open=not hasattr(mw, "lofi_window")):
+        if not hasattr(mw, "lofi_window"):
+            from .main import LofiWindow
+            mw.lofi_window = LofiWindow(mw)
+        mw.lofi_window.show()
+        mw.lofi_window.activateWindow()
 
 def show_settings():
-    d = LofiSettingsDialog(mw)
+    from .dialog_pool import get_dialog
+    from .settings import LofiSettingsDialog
+    d = get_dialog(LofiSettingsDialog, mw)
     d.exec()
 
 # Setup the menu item in Tools
@@ -27,10 +32,42 @@ settings_action = QAction("Settings", mw)
 settings_action.triggered.connect(show_settings)
 lofi_menu.addAction(settings_action)
 
+def show_power_usage():
+    from .ui_utils import show_custom_info
+    from .request_filter import summary as request_summary
+    from .audio_cache import summary as audio_summary
+    extras = [request_summary(), audio_summary()]
+    if hasattr(mw, "lofi_window") and hasattr(mw.lofi_window, "power"):
+        text = mw.lofi_window.power.summary()
+        extras.insert(0, mw.lofi_window.watchdog.summary())
+    else:
+        text = "Open lofi.town first to start measuring."
+    for extra in extras:
+        if extra:
+            text += f"<br><br>{extra}"
+    show_custom_info(text, title="Power Usage")
+
+power_action = QAction("Power Usage", mw)
+power_action.triggered.connect(show_power_usage)
+lofi_menu.addAction(power_action)
+
+def show_performance():
+    from .ui_utils import show_custom_info
+    from .perf_log import summary_html
+    show_custom_info(summary_html(), title="Performance")
+
+perf_action = QAction("Performance", mw)
+perf_action.triggered.connect(show_performance)
+lofi_menu.addAction(perf_action)
+
 # Add separator and reload action for development
 lofi_menu.addSeparator()
+def refresh_addon():
+    from .reload_utils import reload_modules
+    reload_modules()
+
 reload_action = QAction("Refresh Add-on", mw)
-reload_action.triggered.connect(reload_modules)
+reload_action.triggered.connect(refresh_addon)
 lofi_menu.addAction(reload_action)
 
 def show_instructions():
@@ -46,12 +83,10 @@ instr_action.triggered.connect(show_instructions)
 lofi_menu.insertAction(settings_action, instr_action)
 
 def check_welcome_screen():
-    config = mw.addonManager.getConfig(__name__)
-    if config is None:
-        config = {}
+    from .config_service import get_config
     
     # Default true if not set
-    if config.get("show_welcome", True):
+    if get_config().show_welcome:
         # We need to show the welcome screen
         # Use a timer to ensure main window is visible/ready
         from .welcome_dialog import WelcomeDialog
@@ -62,8 +97,34 @@ def check_welcome_screen():
         mw.welcome_dialog.raise_()
 
 from aqt import gui_hooks
-gui_hooks.profile_did_open.append(check_welcome_screen)
+from . import hook_registry
+hook_registry.register(gui_hooks.profile_did_open, check_welcome_screen)
+
+# Start Chromium in the background so the first open is fast
+def prewarm_profile():
+    from .profile_manager import schedule_prewarm
+    schedule_prewarm()
+
+hook_registry.register(gui_hooks.profile_did_open, prewarm_profile)
+
+# Scale the dialog logos off the GUI thread
+def prewarm_images():
+    from .image_utils import prewarm
+    prewarm()
+
+hook_registry.register(gui_hooks.profile_did_open, prewarm_images)
 
 # Initialize deck browser widget
 from .deck_widget import init_deck_widget
-init_deck_widget()
\ No newline at end of file
+init_deck_widget()
+
+# Baseline for "Refresh Add-on", which only reloads files edited after this point
+def snapshot_modules():
+    if getattr(mw, "_lofi_reload_snapshot", None) is not None:
+        # Opening another profile keeps the original baseline
+        return
+    from .reload_utils import take_snapshot
+    # Hashed on a worker, so touching a file without changing it doesn't trigger a reload
+    mw.taskman.run_in_background(take_snapshot)
+
+hook_registry.register(gui_hooks.profile_did_open, snapshot_modules)
\ No newline at end of file
@@ -0,0 +1,392 @@
+"""
+Disk cache for the music played by lofi.town.
+A small HTTP server on 127.0.0.1 sits between the page and the audio CDN: the request
+interceptor redirects audio requests to it, it downloads each track once into
+user_files/audio_cache, passing the data on to the player as it arrives, and serves it from
+disk (with Range support for seeking) afterwards.
+The folder is kept under audio_cache_max_mb by evicting the least recently played tracks.
+The server only answers on a random per-session path and only for URLs the interceptor
+redirected, so nothing else on the machine can use it as a proxy. Live streams and
+oversized files aren't cached, and neither are tracks whose download fails; the player is
+sent back to the original URL for those.
+"""
+
+from aqt import mw
+import hashlib
+import os
+import secrets
+import threading
+from urllib.parse import parse_qs, quote, urlsplit
+
+from . import cache_utils
+from .config_service import get_config
+
+CACHE_FOLDER = "audio_cache"
+AUDIO_EXTENSIONS = {".mp3", ".ogg", ".oga", ".opus", ".m4a", ".aac", ".wav", ".flac", ".webm"}
+DEFAULT_CONTENT_TYPE = "audio/mpeg"
+UPSTREAM_TIMEOUT_SECONDS = 20
+COPY_CHUNK_SIZE = 64 * 1024
+# Largest single file kept (also never more than the whole cache)
+MAX_TRACK_BYTES = 50 * 1024 * 1024
+
+# Track URLs remembered per session (redirected, uncacheable); the oldest are forgotten first
+MAX_REMEMBERED_URLS = 2000
+
+# A fixed set of locks shared out by path, so a track is only downloaded once while other
+# tracks are still served, without keeping a lock for every track ever played
+_track_locks = [threading.Lock() for _ in range(64)]
+_prune_lock = threading.Lock()
+
+
+def _track_lock(path):
+    return _track_locks[hash(path) % len(_track_locks)]
+
+
+def cache_dir():
+    return cache_utils.user_files_path(CACHE_FOLDER)
+
+
+def cache_path(url):
+    """File a track is stored in: hashed URL plus the original extension."""
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    if extension not in AUDIO_EXTENSIONS:
+        extension = ".bin"
+    return os.path.join(cache_dir(), hashlib.sha1(url.encode("utf-8")).hexdigest()[:24] + extension)
+
+
+def content_type(path):
+    import mimetypes
+
+    guessed, _encoding = mimetypes.guess_type(path)
+    return guessed if guessed and not path.endswith(".bin") else DEFAULT_CONTENT_TYPE
+
+
+def is_audio_url(url, resource_type=None):
+    """True for requests worth caching: media loads, or URLs ending in an audio extension."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or parts.hostname in ("127.0.0.1", "localhost"):
+        return False
+    if resource_type == "ResourceTypeMedia":
+        return True
+    return os.path.splitext(parts.path)[1].lower() in AUDIO_EXTENSIONS
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single 'bytes=' range, or None for the whole file."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes="):].partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # "bytes=-500" is the last 500 bytes
+            start = max(0, size - int(end_text))
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+class NotCacheable(Exception):
+    """The response has no length (e.g. a live stream) or is larger than max_bytes."""
+
+
+def download(url, path, max_bytes, on_length=None, on_chunk=None):
+    """
+    Fetch url into path via a temporary file, renamed into place once complete. Blocking; runs
+    on a server thread. on_length(length) is called once the response is known to be cacheable
+    and on_chunk(data) as the data arrives, so the player is served during the download.
+    """
+    import urllib.request
+
+    from .profile_manager import USER_AGENT
+
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}{cache_utils.PARTIAL_MARKER}{threading.get_ident()}"
+    try:
+        with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT_SECONDS) as response:
+            length = response.headers.get("Content-Length", "")
+            if not length.isdigit() or int(length) > max_bytes:
+                # An Icecast-style stream never ends, so it would never start playing
+                raise NotCacheable(f"Content-Length {length or 'missing'}")
+            length = int(length)
+            if on_length:
+                on_length(length)
+            copied = 0
+            chunk = b""
+            with open(temp_path, "wb") as f:
+                while copied < length:
+                    if chunk and on_chunk:
+                        on_chunk(chunk)
+                    # read1 returns what has arrived instead of waiting for a full chunk
+                    chunk = response.read1(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        raise OSError(f"connection closed after {copied} of {length} bytes")
+                    copied += len(chunk)
+                    f.write(chunk)
+        os.replace(temp_path, path)
+        # Passed on last, so a player that has the whole track finds it in the cache
+        if chunk and on_chunk:
+            on_chunk(chunk)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _make_handler(cache_server):
+    from http.server import BaseHTTPRequestHandler
+
+    class AudioCacheHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_OPTIONS(self):
+            # CORS / private network preflight from the https page
+            self.send_response(204)
+            self._send_cors_headers()
+            self.send_header("Access-Control-Allow-Headers", "Range")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _send_cors_headers(self):
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Private-Network", "true")
+            self.send_header("Access-Control-Expose-Headers", "Content-Length, Content-Range, Accept-Ranges")
+
+        def _serve(self, send_body):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            url = query.get("u", [""])[0]
+            if parts.path != cache_server.path or url not in cache_server.redirected:
+                self.send_error(404)
+                return
+            # Same check as the interceptor made, which knew the request's resource type
+            resource_type = "ResourceTypeMedia" if query.get("m") == ["1"] else None
+            if not is_audio_url(url, resource_type):
+                self.send_error(400, "Not an audio URL")
+                return
+
+            path = cache_path(url)
+            with _track_lock(path):
+                hit = os.path.exists(path)
+                if hit:
+                    try:
+                        # Mark as recently played for eviction (atime is often not updated)
+                        os.utime(path)
+                    except OSError:
+                        hit = False
+                if not hit:
+                    self._download_and_send(url, path, send_body)
+                    return
+            cache_server.stats["hits"] += 1
+            self._send_file(path, send_body)
+
+        def _download_and_send(self, url, path, send_body):
+            """Download a track into the cache while sending it to the player."""
+            response = {"headers_sent": False, "range": None, "offset": 0, "sent": 0, "connected": send_body}
+
+            def on_length(size):
+                response["headers_sent"] = True
+                response["range"] = self._send_headers(path, size)
+                if response["range"] is None:
+                    response["connected"] = False
+                # Make room for the track before it is stored
+                with _prune_lock:
+                    cache_utils.prune_cache(cache_dir(), max(0, cache_server.max_bytes - size))
+
+            def on_chunk(chunk):
+                offset = response["offset"]
+                response["offset"] += len(chunk)
+                if not response["connected"]:
+                    return
+                start, length = response["range"]
+                low = max(start, offset)
+                high = min(start + length, offset + len(chunk))
+                if low >= high:
+                    return
+                try:
+                    self.wfile.write(chunk[low - offset:high - offset])
+                    response["sent"] += high - low
+                except (BrokenPipeError, ConnectionResetError):
+                    # The player went elsewhere; finish the download so the track is cached
+                    response["connected"] = False
+
+            try:
+                download(url, path, cache_server.max_track_bytes, on_length, on_chunk)
+            except Exception as e:
+                if response["headers_sent"]:
+                    # Too late to redirect: drop the connection and let the player retry
+                    print(f"lofi.town: audio cache download of {url} failed: {e}")
+                    self.close_connection = True
+                    return
+                # A live stream, an oversized file or a failed fetch (403, timeout, DNS...): the
+                # player loads it straight from the CDN, and the interceptor stops redirecting it
+                cache_server.mark_uncacheable(url)
+                print(f"lofi.town: not caching {url}: {e}")
+                self.send_response(307)
+                self._send_cors_headers()
+                self.send_header("Location", url)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            cache_server.stats["misses"] += 1
+            cache_server.stats["bytes_served"] += response["sent"]
+
+        def _send_headers(self, path, size):
+            """
+            Send the response headers for the requested range of a size-byte track. Returns
+            (start, length) of the bytes to send, or None after a 416.
+            """
+            try:
+                byte_range = parse_range(self.headers.get("Range"), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+
+            start, end = byte_range if byte_range else (0, size - 1)
+            length = max(0, end - start + 1)
+            self.send_response(206 if byte_range else 200)
+            self._send_cors_headers()
+            self.send_header("Content-Type", content_type(path))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(length))
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            return start, length
+
+        def _send_file(self, path, send_body):
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                # Evicted since the lookup
+                self.send_error(503)
+                return
+            byte_range = self._send_headers(path, size)
+            if byte_range is None or not send_body:
+                return
+
+            start, length = byte_range
+            remaining = length
+            try:
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    while remaining > 0:
+                        chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # The player dropped the connection, e.g. to seek elsewhere
+                pass
+            except OSError as e:
+                print(f"lofi.town: audio cache failed to serve {path}: {e}")
+            cache_server.stats["bytes_served"] += length - remaining
+
+        def log_message(self, *args):
+            pass
+
+    return AudioCacheHandler
+
+
+class AudioCacheServer:
+    """Threaded HTTP server on a free loopback port, running on a daemon thread."""
+
+    def __init__(self, max_bytes):
+        from http.server import ThreadingHTTPServer
+
+        self.max_bytes = max_bytes
+        self.max_track_bytes = min(max_bytes, MAX_TRACK_BYTES)
+        self.stats = {"hits": 0, "misses": 0, "bytes_served": 0}
+        # Unguessable, so websites and other programs can't reach the server through the browser
+        self.path = f"/{secrets.token_urlsafe(16)}/a"
+        # Track URLs the interceptor sent here (nothing else is fetched), and those it no longer
+        # sends because they couldn't be cached. Dicts used as bounded, insertion-ordered sets
+        self.redirected = {}
+        self.uncacheable = {}
+        self._urls_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="lofi-audio-cache", daemon=True)
+        self.thread.start()
+
+    def proxy_url(self, url, media=False):
+        """
+        Local URL for a track, allowing the server to fetch it. media marks a media load whose
+        URL has no audio extension.
+        """
+        self._remember(self.redirected, url)
+        return f"http://127.0.0.1:{self.port}{self.path}?u={quote(url, safe='')}" + ("&m=1" if media else "")
+
+    def mark_uncacheable(self, url):
+        self._remember(self.uncacheable, url)
+
+    def _remember(self, urls, url):
+        with self._urls_lock:
+            # Re-inserted so a track still being played is the last to be forgotten
+            urls.pop(url, None)
+            urls[url] = True
+            while len(urls) > MAX_REMEMBERED_URLS:
+                del urls[next(iter(urls))]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def get_max_bytes(config):
+    try:
+        max_mb = int(config.audio_cache_max_mb)
+    except (TypeError, ValueError):
+        max_mb = 0
+    return max(1, max_mb) * 1024 * 1024
+
+
+def start():
+    """Start the cache server if enabled; returns it, or None."""
+    server = getattr(mw, "_lofi_audio_server", None)
+    config = get_config()
+    if server is not None or not config.audio_cache:
+        return server
+    try:
+        server = AudioCacheServer(get_max_bytes(config))
+    except OSError as e:
+        print(f"lofi.town: could not start audio cache: {e}")
+        return None
+    # Stored on mw so a reload doesn't start a second server
+    mw._lofi_audio_server = server
+    return server
+
+
+def proxy_url_for(url, resource_type=None):
+    """URL to redirect an audio request to, or None to let it through unchanged."""
+    server = getattr(mw, "_lofi_audio_server", None)
+    if server is None or url in server.uncacheable or not is_audio_url(url, resource_type):
+        return None
+    return server.proxy_url(url, media=resource_type == "ResourceTypeMedia")
+
+
+def summary():
+    server = getattr(mw, "_lofi_audio_server", None)
+    if server is None or not (server.stats["hits"] or server.stats["misses"]):
+        return ""
+    stats = server.stats
+    return (
+        f"<b>Audio cache:</b> {stats['hits']} from disk, {stats['misses']} downloaded "
+        f"({cache_utils.cache_size(cache_dir()) / (1024 * 1024):.0f} MB stored)"
+    )
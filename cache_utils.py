@@ -0,0 +1,147 @@
+"""
+Cache helpers for the lofi.town web profile.
+Reads the HTTP cache settings (Chromium keeps its disk cache under the cap itself), keeps the
+audio cache under its size limit by pruning the least recently played tracks, and clears
+discarded cache folders without blocking the GUI thread.
+"""
+
+import os
+import shutil
+import time
+
+CACHE_MODE_MEMORY = "memory"
+CACHE_MODE_DISK = "disk"
+DEFAULT_CACHE_MAX_MB = 200
+
+TRASH_MARKER = ".trash-"
+# Temporary files of downloads in progress; older ones were left by an interrupted session
+PARTIAL_MARKER = ".part-"
+PARTIAL_STALE_SECONDS = 10 * 60
+
+
+def user_files_path(*parts):
+    """Return a path inside the add-on's user_files folder (kept across add-on updates)."""
+    return os.path.join(os.path.dirname(__file__), "user_files", *parts)
+
+
+def get_cache_settings(config):
+    """Return (mode, max_bytes) from the add-on config, falling back to safe defaults."""
+    config = config or {}
+
+    mode = config.get("cache_mode", CACHE_MODE_DISK)
+    if mode not in (CACHE_MODE_MEMORY, CACHE_MODE_DISK):
+        mode = CACHE_MODE_DISK
+
+    try:
+        max_mb = int(config.get("cache_max_mb", DEFAULT_CACHE_MAX_MB))
+    except (TypeError, ValueError):
+        max_mb = DEFAULT_CACHE_MAX_MB
+    if max_mb <= 0:
+        max_mb = DEFAULT_CACHE_MAX_MB
+
+    return mode, max_mb * 1024 * 1024
+
+
+def _cache_entries(path):
+    """Yield (file_path, size, last_used) for every file under path, except downloads in progress."""
+    now = time.time()
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if PARTIAL_MARKER in name and now - stat.st_mtime < PARTIAL_STALE_SECONDS:
+                continue
+            # atime is often disabled (noatime mounts), so fall back on mtime
+            yield file_path, stat.st_size, max(stat.st_atime, stat.st_mtime)
+
+
+def cache_size(path):
+    """Total size in bytes of the files under path."""
+    return sum(size for _path, size, _used in _cache_entries(path))
+
+
+def prune_cache(path, max_bytes):
+    """
+    Delete least recently used files until the folder fits in max_bytes. Used for the audio
+    cache, where a replayed track's mtime is refreshed. Returns (files_removed, bytes_removed).
+    """
+    if not os.path.isdir(path):
+        return 0, 0
+
+    entries = sorted(_cache_entries(path), key=lambda entry: entry[2])
+    total = sum(size for _path, size, _used in entries)
+
+    removed_files = 0
+    removed_bytes = 0
+    for file_path, size, _used in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            print(f"Failed to prune cache entry: {e}")
+            continue
+        total -= size
+        removed_files += 1
+        removed_bytes += size
+
+    return removed_files, removed_bytes
+
+
+def move_to_trash(path):
+    """
+    Rename a folder out of the way so it can be deleted later.
+    Renaming is a cheap metadata operation, unlike deleting a large tree.
+    Returns the new path, or None if there was nothing to move.
+    """
+    if not os.path.exists(path):
+        return None
+
+    trash_path = f"{path}{TRASH_MARKER}{os.urandom(4).hex()}"
+    try:
+        os.rename(path, trash_path)
+    except OSError as e:
+        print(f"Failed to move cache to trash: {e}")
+        return None
+    return trash_path
+
+
+def find_trash(folder):
+    """Return trash folders left in folder by earlier sessions (e.g. Anki quit mid-delete)."""
+    if not os.path.isdir(folder):
+        return []
+    return [
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if TRASH_MARKER in name
+    ]
+
+
+def delete_paths(paths):
+    """
+    Delete the given trash folders. Meant to run on a worker thread.
+    Returns (folders_removed, bytes_removed, seconds_taken).
+    """
+    start = time.monotonic()
+    removed_folders = 0
+    removed_bytes = 0
+
+    for path in paths:
+        size = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _dirs, files in os.walk(path)
+            for name in files
+            if os.path.isfile(os.path.join(root, name))
+        )
+        try:
+            shutil.rmtree(path)
+        except Exception as e:
+            print(f"Failed to clean cache: {e}")
+            continue
+        removed_folders += 1
+        removed_bytes += size
+
+    return removed_folders, removed_bytes, time.monotonic() - start
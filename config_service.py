@@ -0,0 +1,104 @@
+"""
+Add-on config, loaded once and shared by every module.
+Values are available as attributes (config.always_on_top), and subscribers are told
+which keys changed whenever the config is saved, so settings apply live.
+"""
+
+from aqt import mw
+
+# Fallbacks for keys missing from the user's config
+DEFAULTS = {
+    "always_on_top": False,
+    "hide_widget": False,
+    "show_welcome": True,
+    "cache_mode": "disk",
+    "cache_max_mb": 200,
+    "prewarm_profile": False,
+    "low_power_mode": True,
+    "low_power_fps": 5,
+    "throttle_unfocused": False,
+    "close_mode": "keep_alive",
+    "keep_alive_minutes": 30,
+    "app_stylesheet": False,
+    "stats_url": "",
+    "stats_ttl_minutes": 10,
+    "block_trackers": True,
+    "blocklist": [],
+    "audio_cache": True,
+    "audio_cache_max_mb": 300,
+    "renderer_max_mb": 1500,
+    "perf_log": False,
+}
+
+
+class LofiConfig:
+    def __init__(self):
+        self._addon_id = mw.addonManager.addonFromModule(__name__)
+        self._values = self._read()
+        self._subscribers = {}
+
+    def _read(self):
+        values = dict(DEFAULTS)
+        values.update(mw.addonManager.getConfig(self._addon_id) or {})
+        return values
+
+    def __getattr__(self, name):
+        # Only called for names that aren't regular attributes
+        try:
+            return self.__dict__["_values"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def as_dict(self):
+        return dict(self._values)
+
+    def update(self, **changes):
+        """Save the given values and notify subscribers of the ones that changed."""
+        values = dict(self._values)
+        values.update(changes)
+        mw.addonManager.writeConfig(self._addon_id, values)
+        self._apply(values)
+
+    def reload(self, *args):
+        """Re-read the config, e.g. after it was edited in Anki's config editor."""
+        self._apply(self._read())
+
+    def _apply(self, values):
+        changed = {key for key in set(values) | set(self._values) if values.get(key) != self._values.get(key)}
+        self._values = values
+        if not changed:
+            return
+
+        for callback in list(self._subscribers.values()):
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"lofi.town config subscriber failed: {e}")
+
+    def subscribe(self, callback):
+        """
+        Call callback(changed_keys) after every config change.
+        Subscribing again with a function of the same name (e.g. after a module reload) replaces it.
+        """
+        self._subscribers[_callback_key(callback)] = callback
+
+    def unsubscribe(self, callback):
+        self._subscribers.pop(_callback_key(callback), None)
+
+
+def _callback_key(callback):
+    return f"{callback.__module__}.{callback.__qualname__}"
+
+
+def get_config():
+    """Return the shared config, loading it on first use."""
+    config = getattr(mw, "_lofi_config", None)
+    if config is None:
+        config = LofiConfig()
+        # Stored on mw so subscribers survive add-on reloads
+        mw._lofi_config = config
+        mw.addonManager.setConfigUpdatedAction(__name__, config.reload)
+    return config
@@ -5,167 +5,192 @@ Displays a 200px by 200px widget with Lofi Town stats on the deck browser.
 
 from aqt import mw, gui_hooks
 import aqt.deckbrowser
+import hashlib
+from html import escape as html_escape
+import json
 import os
-import base64
 
-# Cache for the widget HTML
+from . import hook_registry, perf_log, stats_fetcher
+from .cache_utils import user_files_path
+from .config_service import get_config
+
+# Cache for the widget HTML, and the render key it was built for
 cached_html = None
+cached_key = None
 
-def generate_css():
-    """Generate CSS for the Lofi Town widget."""
-    
-    # Custom colors for Lofi Town
-    bg_color = "#DCE597"
-    button_color = "#8B9556"
-    button_hover_color = "#372411"
-    
-    return f"""
-        #lofi-widget-container {{
-            position: relative;
-            display: inline-block;
-            margin-top: 20px;
-            margin-bottom: 20px;
-            margin-left: 6.875px;
-            margin-right: 6.875px;
-            
-        }}
-        
-        #lofi-widget {{
-            width: 200px;
-            height: 200px;
-            border-radius: 25px;
-            background: {bg_color};
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            padding: 15px;
-            box-sizing: border-box;
-            position: relative;
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-        }}
-
-        #lofi-widget .top-buttons {{
-            position: absolute;
-            top: 10px;
-            right: 10px;
-            display: flex;
-            flex-direction: column;
-            gap: 0px;
-            z-index: 10;
-        }}
-
-        #lofi-widget .icon-btn {{
-            width: 28px;
-            height: 24px;
-            cursor: pointer;
-            background-color: transparent;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 2px;
-        }}
-
-        #lofi-widget .icon-btn svg {{
-            width: 20px; 
-            height: 20px; 
-            fill: {button_color}; 
-            transition: fill 0.3s;
-        }}
-
-        #lofi-widget .icon-btn:hover svg {{
-            fill: {button_hover_color};
-        }}
-        
-        #lofi-widget .main-image {{
-            width: 100px;
-            height: 100px;
-            object-fit: contain;
-            margin-bottom: 15px;
-        }}
-        
-        #lofi-widget .action-btn {{
-            background-color: {button_color};
-            color: white;
-            border: none;
-            border-radius: 20px;
-            padding: 10px 20px;
-            font-size: 14px;
-            font-weight: bold;
-            cursor: pointer;
-            transition: background-color 0.3s, color 0.3s;
-        }}
-        
-        #lofi-widget .action-btn:hover {{
-            background-color: white;
-            color: {button_color};
-        }}
-    """
+# Rendered HTML persisted across sessions, keyed by render_key()
+RENDER_CACHE_FILE = "widget_cache.json"
+RENDER_CACHE_MAX_ENTRIES = 8
+
+# Files the rendered widget depends on; a change to any of them invalidates the cache
+WIDGET_INPUT_FILES = [
+    "deck_widget.py",
+    "web/deck_widget.css",
+    "assets/bunny_lofi_town.png",
+    "assets/gear.svg",
+    "assets/refresh.svg",
+    "assets/carrot.svg",
+]
+
+# Config entries that affect the rendered widget
+WIDGET_CONFIG_KEYS = ["hide_widget", "stats_url"]
+
+# Stats shown under the image, in order: (key in stats_fetcher data, label)
+STAT_ROWS = [
+    ("stamina", "Stamina"),
+    ("trainer_exp", "EXP"),
+    ("loot_collection", "Loot"),
+]
+
+# Patches the widget in the deck browser page without re-rendering the deck list.
+# Defines window.lofiWidgetUpdate(html) on first use; an empty html removes the widget.
+# Returns false when the page doesn't have the expected layout, so the caller can fall back.
+UPDATE_JS = """
+(function(html) {
+    if (!window.lofiWidgetUpdate) {
+        window.lofiWidgetUpdate = function(html) {
+            var container = document.getElementById('lofi-widget-container');
+            if (!html) {
+                if (container) { container.remove(); }
+                return true;
+            }
+            if (container) {
+                container.outerHTML = html;
+                return true;
+            }
+            // The stats area is the last part of the deck browser's <center> block
+            var target = document.querySelector('center');
+            if (!target) { return false; }
+            target.insertAdjacentHTML('beforeend', html);
+            return true;
+        };
+    }
+    return window.lofiWidgetUpdate(html);
+})(%s);
+"""
+
+_input_fingerprint = None
+_disk_cache = None
+
+# Files the deck browser may load from the add-on folder. Serving them by URL instead of
+# inlining them lets the webview cache them and keeps the per-render HTML small.
+WEB_EXPORTS = r"(assets|web)/.*\.(css|png|svg)"
+
+def get_web_url(path):
+    """Return the URL of an exported add-on file, e.g. 'assets/carrot.svg'."""
+    addon_package = mw.addonManager.addonFromModule(__name__)
+    # The version query makes the webview fetch the file again after an update
+    return f"/_addons/{addon_package}/{path}?v={get_input_fingerprint()[:8]}"
+
+def get_input_fingerprint():
+    """Hash of the size and mtime of every widget input file, computed once per module load."""
+    global _input_fingerprint
+    if _input_fingerprint is None:
+        addon_dir = os.path.dirname(__file__)
+        digest = hashlib.sha1()
+        for path in WIDGET_INPUT_FILES:
+            try:
+                stat = os.stat(os.path.join(addon_dir, path))
+                digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+            except OSError:
+                digest.update(f"{path}:missing;".encode())
+        _input_fingerprint = digest.hexdigest()
+    return _input_fingerprint
+
+def render_key(config, stats=None):
+    """Key identifying every input of the rendered widget: files, theme, config and stats."""
+    is_dark = mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
+    widget_config = {key: config.get(key) for key in WIDGET_CONFIG_KEYS}
+    inputs = [get_input_fingerprint(), is_dark, widget_config, stats]
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def load_disk_cache():
+    """Read the persisted render cache once per module load."""
+    global _disk_cache
+    if _disk_cache is None:
+        try:
+            with open(user_files_path(RENDER_CACHE_FILE), "r", encoding="utf-8") as f:
+                _disk_cache = json.load(f)
+        except (OSError, ValueError):
+            _disk_cache = {}
+    return _disk_cache
+
+def save_disk_cache(key, html):
+    cache = load_disk_cache()
+    cache.pop(key, None)
+    cache[key] = html
+    # Dicts keep insertion order, so the first keys are the oldest
+    while len(cache) > RENDER_CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)))
+
+    path = user_files_path(RENDER_CACHE_FILE)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        print(f"Failed to save widget cache: {e}")
+
+def get_widget_html(config):
+    """Return the widget HTML for the current inputs, generating it only if they changed."""
+    global cached_html, cached_key
+
+    # Never waits for the network: stale or missing stats start a refresh in the background
+    stats = stats_fetcher.get_cached_stats()
+    key = render_key(config, stats)
+    if cached_html is not None and cached_key == key:
+        return cached_html
+
+    html = load_disk_cache().get(key)
+    if html is None:
+        html = f"<div id='lofi-widget-container'>{generate_html(stats)}</div>"
+        save_disk_cache(key, html)
 
-def get_svg_content(filename):
-    """Read SVG content from assets folder."""
-    addon_dir = os.path.dirname(__file__)
-    path = os.path.join(addon_dir, "assets", filename)
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Strip potential <?xml ... ?> and DOCTYPE headers for cleaner embedding
-            # Also remove existing fill attributes or style tags if we want CSS to control it rigidly,
-            # but our CSS selectors targeting 'svg' fill should override attributes.
-            # To be safe, we can remove the <svg ...> tag and wrapper logic if we want, or just return raw.
-            # The reference code returned raw.
-            return content
-    return ""
-
-def get_image_base64(filename):
-    """Read image and return base64 string."""
-    addon_dir = os.path.dirname(__file__)
-    path = os.path.join(addon_dir, "assets", filename)
-    if os.path.exists(path):
-        with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode('utf-8')
-    return ""
-
-def generate_html():
+    cached_html = html
+    cached_key = key
+    return html
+
+def generate_stats_html(stats):
+    """Small stats rows shown under the image, or nothing if no stats were fetched."""
+    if not stats:
+        return ""
+    values = stats.get("stats", {})
+    rows = [
+        f'<span class="stat"><b>{label}</b> {html_escape(values[key])}</span>'
+        for key, label in STAT_ROWS
+        if key in values
+    ]
+    if stats.get("level"):
+        rows.append(f'<span class="stat"><b>LV</b> {html_escape(stats["level"])}</span>')
+    if not rows:
+        return ""
+    return f'<div class="stats">{"".join(rows)}</div>'
+
+@perf_log.timed("generate_html")
+def generate_html(stats=None):
     """Generate HTML for the Lofi Town widget."""
     
     # Top Buttons
-    gear_svg = get_svg_content("gear.svg")
-    refresh_svg = get_svg_content("refresh.svg")
-    carrot_svg = get_svg_content("carrot.svg")
-    
-    buttons_html = f"""
+    buttons_html = """
         <div class="top-buttons">
-            <div class="icon-btn" onclick="pycmd('lofi:settings')" title="Settings">
-                {gear_svg}
-            </div>
-            <div class="icon-btn" onclick="pycmd('lofi:refresh')" title="Refresh">
-                {refresh_svg}
-            </div>
-            <div class="icon-btn" onclick="pycmd('lofi:main')" title="Open Web App">
-                {carrot_svg}
-            </div>
+            <div class="icon-btn" onclick="pycmd('lofi:settings')" title="Settings"><div class="icon icon-gear"></div></div>
+            <div class="icon-btn" onclick="pycmd('lofi:refresh')" title="Refresh"><div class="icon icon-refresh"></div></div>
+            <div class="icon-btn" onclick="pycmd('lofi:main')" title="Open Web App"><div class="icon icon-carrot"></div></div>
         </div>
     """
 
     # Main Image
-    img_b64 = get_image_base64("bunny_lofi_town.png")
-    img_html = ""
-    if img_b64:
-        img_html = f'<img class="main-image" src="data:image/png;base64,{img_b64}" alt="Lofi Town Bunny">'
+    img_html = f'<img class="main-image" src="{get_web_url("assets/bunny_lofi_town.png")}" alt="Lofi Town Bunny">'
 
     # Main Button
-    action_btn = f'''
-        <button class="action-btn" onclick="pycmd('lofi:open')">
-            Open lofi.town
-        </button>
-    '''
+    action_btn = """<button class="action-btn" onclick="pycmd('lofi:open')">Open lofi.town</button>"""
     
     return f"""
+        <link rel="stylesheet" href="{get_web_url("web/deck_widget.css")}">
         <div id="lofi-widget">
             {buttons_html}
             {img_html}
+            {generate_stats_html(stats)}
             {action_btn}
         </div>
     """
@@ -174,9 +199,8 @@ def handle_lofi_commands(handled, message, context):
     """Handle JS messages from the widget."""
     if message == "lofi:settings":
         from . import show_settings
+        # Saved changes reach the widget through on_config_changed
         show_settings()
-        reset_cache()
-        mw.deckBrowser.refresh()
         return (True, None)
     elif message == "lofi:open":
         from . import show_lofi
@@ -188,56 +212,74 @@ def handle_lofi_commands(handled, message, context):
         return (True, None)
     elif message == "lofi:refresh":
         from .reload_utils import reload_modules
+        # Fetched again when the deck browser re-renders
+        stats_fetcher.expire()
         reload_modules()
         return (True, None)
     return handled
 
+@perf_log.timed("add_widget")
 def add_widget_to_deck_browser(deck_browser: aqt.deckbrowser.DeckBrowser, 
                                 content: aqt.deckbrowser.DeckBrowserContent):
     """Appends the Lofi widget to the deck browser's stats area."""
-    global cached_html
-    
-    # Check if widget should be hidden
-    addon_id = mw.addonManager.addonFromModule(__name__)
-    config = mw.addonManager.getConfig(addon_id)
-    if config and config.get("hide_widget", False):
+    # Every render builds a new content object, so tagging it marks this render as handled
+    # even if another copy of this hook runs after us
+    if getattr(content, "_lofi_render_generation", None) is not None:
         return
+    mw._lofi_render_generation = getattr(mw, "_lofi_render_generation", 0) + 1
+    content._lofi_render_generation = mw._lofi_render_generation
 
-    # Prevent adding the widget multiple times in the same render
-    if "<div id='lofi-widget-container'>" in content.stats:
+    # Check if widget should be hidden
+    config = get_config()
+    if config.hide_widget:
         return
-    
-    if cached_html is None:
-        css = generate_css()
-        html_content = generate_html()
-        cached_html = f"<div id='lofi-widget-container'><style>{css}</style>{html_content}</div>"
-    
-    content.stats += cached_html
+
+    content.stats += get_widget_html(config)
 
 def reset_cache(*args, **kwargs):
-    """Clears the cached HTML, forcing a refresh on next view."""
-    global cached_html
+    """Clears the in-memory HTML; the next render is served from the on-disk cache if still valid."""
+    global cached_html, cached_key
     cached_html = None
+    cached_key = None
+
+def update_widget(on_done=None):
+    """
+    Show, hide or replace the widget in the open deck browser in place.
+    Falls back to a full deck browser refresh if the page can't be patched.
+    """
+    if mw.state != "deckBrowser":
+        # The next render picks up the change
+        return
+
+    config = get_config()
+    html = "" if config.hide_widget else get_widget_html(config)
+
+    def after_update(patched):
+        if not patched:
+            mw.deckBrowser.refresh()
+        if on_done:
+            on_done(bool(patched))
+
+    mw.deckBrowser.web.evalWithCallback(UPDATE_JS % json.dumps(html), after_update)
 
 def on_theme_change():
-    """Reset cache and refresh deck browser when theme changes."""
-    reset_cache()
-    if mw.state == "deckBrowser":
-        mw.deckBrowser.refresh()
+    """Update the widget when theme changes (the theme is part of the render key)."""
+    update_widget()
+
+def on_config_changed(changed):
+    """Update the widget when a setting it depends on changes."""
+    if "stats_url" in changed:
+        stats_fetcher.reset()
+    if set(changed) & set(WIDGET_CONFIG_KEYS):
+        update_widget()
 
 def init_deck_widget():
-    """Initialize the deck browser widget."""
-    # Register hooks
-    # We should ensure we don't register hooks multiple times on reload
-    # A simple way to avoid duplicates if this module is reloaded is tricky in this context, 
-    # but for now we follow the pattern provided.
-    gui_hooks.deck_browser_will_render_content.append(add_widget_to_deck_browser)
-    gui_hooks.reviewer_will_end.append(reset_cache)
-    gui_hooks.sync_did_finish.append(reset_cache)
-    gui_hooks.theme_did_change.append(on_theme_change)
-    
-    # Register command handler if not already done
-    if not hasattr(mw, "_lofi_widget_initialized"):
-        gui_hooks.webview_did_receive_js_message.append(handle_lofi_commands)
-        mw._lofi_widget_initialized = True
+    """Initialize the deck browser widget. Can be called again after reloading this module."""
+    mw.addonManager.setWebExports(__name__, WEB_EXPORTS)
+
+    hook_registry.register(gui_hooks.deck_browser_will_render_content, add_widget_to_deck_browser)
+    hook_registry.register(gui_hooks.theme_did_change, on_theme_change)
+    hook_registry.register(gui_hooks.webview_did_receive_js_message, handle_lofi_commands)
+    get_config().subscribe(on_config_changed)
+
 
@@ -0,0 +1,55 @@
+"""
+Keeps one hidden instance per dialog type, so opening a dialog again reuses it instead of
+rebuilding its fonts, pixmaps, stylesheet and layouts. Pooled dialogs implement rebind()
+to take new content, and the pool is emptied when the theme changes.
+"""
+
+from aqt import mw, gui_hooks
+
+from . import hook_registry
+
+
+def _get_pool():
+    # Stored on mw so pooled dialogs aren't orphaned by an add-on reload
+    pool = getattr(mw, "_lofi_dialog_pool", None)
+    if pool is None:
+        pool = {}
+        mw._lofi_dialog_pool = pool
+    return pool
+
+
+def get_dialog(dialog_class, *args, **kwargs):
+    """Return the pooled instance of dialog_class, rebound with the given arguments."""
+    pool = _get_pool()
+    key = dialog_class.__name__
+    dialog = pool.get(key)
+
+    if dialog is not None and type(dialog) is not dialog_class:
+        # Built by a previous version of the module, before a reload
+        pool.pop(key).deleteLater()
+        dialog = None
+
+    if dialog is None:
+        dialog = dialog_class(*args, **kwargs)
+        pool[key] = dialog
+        return dialog
+
+    if dialog.isVisible():
+        # Already on screen (e.g. an info message on top of another one), use a throwaway
+        return dialog_class(*args, **kwargs)
+
+    dialog.rebind(*args, **kwargs)
+    return dialog
+
+
+def clear(*args):
+    """Drop every pooled dialog; the next open builds a fresh one."""
+    pool = _get_pool()
+    for dialog in pool.values():
+        if not dialog.isVisible():
+            dialog.deleteLater()
+    pool.clear()
+
+
+# Dialogs bake the palette into their stylesheets and pixmaps
+hook_registry.register(gui_hooks.theme_did_change, clear)
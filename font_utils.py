@@ -1,11 +1,31 @@
 
 import os
 import base64
+from aqt import mw
 from aqt.qt import QFontDatabase, QApplication
 
 
+def get_font_registry():
+    """
+    Fonts registered with Qt and generated CSS, shared for the whole Anki process.
+    Stored on mw so reloading this module doesn't register the fonts again.
+    """
+    registry = getattr(mw, "_lofi_font_registry", None)
+    if registry is None:
+        registry = {"families": {}, "font_face_css": None}
+        mw._lofi_font_registry = registry
+    return registry
+
+
 def load_custom_font(font_name="Silkscreen-Regular.ttf"):
-    """Load a custom font into QFontDatabase and return the family name."""
+    """Load a custom font into QFontDatabase (once per process) and return the family name."""
+    families = get_font_registry()["families"]
+    if font_name not in families:
+        families[font_name] = _register_font(font_name)
+    return families[font_name]
+
+
+def _register_font(font_name):
     font_path = os.path.join(os.path.dirname(__file__), "assets", font_name)
     
     if not os.path.exists(font_path):
@@ -33,7 +53,14 @@ def get_font_base64(font_name="Silkscreen-Regular.ttf"):
         return None
 
 def get_font_face_css():
-    """Generate @font-face CSS rules for Focumon fonts."""
+    """Return @font-face CSS rules for Focumon fonts, generated once per process."""
+    registry = get_font_registry()
+    if registry["font_face_css"] is None:
+        registry["font_face_css"] = _generate_font_face_css()
+    return registry["font_face_css"]
+
+
+def _generate_font_face_css():
     css = ""
     
     # FE5Cent
@@ -0,0 +1,78 @@
+"""
+Tracks every gui_hooks callback the add-on installs.
+Registering a callback replaces the copy installed by a previous version of its module, and
+unregister_module() removes a module's callbacks before it is reloaded, so reloading never
+leaves duplicate or stale hooks behind.
+"""
+
+from aqt import mw
+
+
+def _get_registry():
+    # Stored on mw so callbacks installed before a reload can still be found and removed
+    registry = getattr(mw, "_lofi_hooks", None)
+    if registry is None:
+        registry = {}
+        mw._lofi_hooks = registry
+    return registry
+
+
+def _module_name(callback):
+    """Module of the callback relative to the add-on package, e.g. 'deck_widget'."""
+    return callback.__module__.rsplit(".", 1)[-1]
+
+
+def _key(hook, callback):
+    # Hooks are process-wide singletons, so their id is stable across reloads of our modules
+    return (id(hook), f"{_module_name(callback)}.{callback.__qualname__}")
+
+
+def register(hook, callback):
+    """Append callback to hook, removing the copy a previous version of the module installed."""
+    registry = _get_registry()
+    key = _key(hook, callback)
+    if key in registry:
+        old_hook, old_callback = registry.pop(key)
+        old_hook.remove(old_callback)
+    hook.append(callback)
+    registry[key] = (hook, callback)
+
+
+def unregister(hook, callback):
+    entry = _get_registry().pop(_key(hook, callback), None)
+    if entry is not None:
+        entry[0].remove(entry[1])
+
+
+def _is_instance_method(callback):
+    return hasattr(callback, "__self__") and not isinstance(callback.__self__, type)
+
+
+def unregister_module(module_name):
+    """
+    Remove every callback defined in the given module; call before reloading it.
+    Methods of live objects (e.g. the open window's power manager) are kept: they stay valid
+    after a reload and are replaced when a new instance registers.
+    """
+    module_name = module_name.rsplit(".", 1)[-1]
+    registry = _get_registry()
+    for key, (hook, callback) in list(registry.items()):
+        if _module_name(callback) == module_name and not _is_instance_method(callback):
+            hook.remove(callback)
+            del registry[key]
+
+
+def hook_count(module_name=None):
+    """Number of callbacks currently installed, optionally only those from one module."""
+    if module_name is None:
+        return len(_get_registry())
+    module_name = module_name.rsplit(".", 1)[-1]
+    return sum(1 for _hook, callback in _get_registry().values() if _module_name(callback) == module_name)
+
+
+def summary():
+    """Installed callbacks grouped by module, for debugging."""
+    modules = {}
+    for _hook, callback in _get_registry().values():
+        modules.setdefault(_module_name(callback), []).append(callback.__qualname__)
+    return {module: sorted(names) for module, names in sorted(modules.items())}
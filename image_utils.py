@@ -0,0 +1,93 @@
+"""
+Shared cache of the scaled logo images used by the dialogs.
+Pixmaps are keyed by asset, logical size and device pixel ratio so each one is decoded and
+scaled once per process. prewarm() scales the usual sizes on a worker thread using QImage.
+"""
+
+from aqt import mw
+from aqt.qt import *
+import os
+
+# (asset, logical width, logical height) shown by the dialogs
+DIALOG_IMAGES = [
+    ("lofi_town_logo.png", 100, None),  # LofiInfoDialog
+    ("lofi_town_name.png", None, 40),   # LofiSettingsDialog
+    ("lofi_town_name.png", 280, None),  # WelcomeDialog
+]
+
+
+def _cache_key(filename, width, height, ratio):
+    return f"lofi:{filename}:{width}:{height}:{ratio:.2f}"
+
+
+def _prescaled_images():
+    """Images scaled by prewarm(), waiting to be turned into pixmaps on the GUI thread."""
+    images = getattr(mw, "_lofi_prescaled_images", None)
+    if images is None:
+        images = {}
+        mw._lofi_prescaled_images = images
+    return images
+
+
+def scale_image(filename, width=None, height=None, ratio=1.0):
+    """Decode and scale an asset. Uses QImage, so it is safe to call off the GUI thread."""
+    path = os.path.join(os.path.dirname(__file__), "assets", filename)
+    if not os.path.exists(path):
+        return None
+
+    image = QImage(path)
+    if image.isNull():
+        return None
+
+    # Scale to (target size * pixel_ratio) so it stays sharp on High DPI screens
+    if width:
+        return image.scaledToWidth(int(width * ratio), Qt.TransformationMode.SmoothTransformation)
+    return image.scaledToHeight(int(height * ratio), Qt.TransformationMode.SmoothTransformation)
+
+
+def get_pixmap(filename, width=None, height=None, ratio=1.0):
+    """Return the asset scaled to the given logical width or height, or None if it is missing."""
+    key = _cache_key(filename, width, height, ratio)
+    pixmap = QPixmapCache.find(key)
+    if pixmap is not None and not pixmap.isNull():
+        return pixmap
+
+    image = _prescaled_images().pop(key, None) or scale_image(filename, width, height, ratio)
+    if image is None:
+        return None
+
+    pixmap = QPixmap.fromImage(image)
+    # Set device pixel ratio so it renders at logical size
+    pixmap.setDevicePixelRatio(ratio)
+    QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+def prewarm(ratio=None):
+    """Scale the dialog images in the background so the first dialog opens without decoding."""
+    if ratio is None:
+        ratio = mw.devicePixelRatioF()
+
+    pending = [
+        (filename, width, height)
+        for filename, width, height in DIALOG_IMAGES
+        if QPixmapCache.find(_cache_key(filename, width, height, ratio)) is None
+    ]
+    if not pending:
+        return
+
+    def scale_all():
+        return {
+            _cache_key(filename, width, height, ratio): scale_image(filename, width, height, ratio)
+            for filename, width, height in pending
+        }
+
+    def on_done(future):
+        try:
+            images = future.result()
+        except Exception as e:
+            print(f"Failed to prepare images: {e}")
+            return
+        _prescaled_images().update({key: image for key, image in images.items() if image is not None})
+
+    mw.taskman.run_in_background(scale_all, on_done)
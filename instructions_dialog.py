@@ -1,8 +1,7 @@
 from aqt import mw
 from aqt.qt import *
 import os
-from . import font_utils
-from .main import LofiWindow
+from . import font_utils, theme
 
 class InstructionsDialog(QDialog):
     def __init__(self, parent=None):
@@ -19,83 +18,8 @@ class InstructionsDialog(QDialog):
         self.setup_ui()
         
     def setup_ui(self):
-        # Detect theme
-        is_dark = mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
-        
-        # Color Palette
-        if is_dark:
-            bg_color = "#7D593A"
-            text_color = "#F9F7E4"
-            btn_bg = "#B48555"
-            btn_text = "#FFFFFF"
-            btn_hover = "#C49565"
-            section_bg = "#68482E"
-            link_color = "#DCE597"
-        else:
-            bg_color = "#F9F7E4"
-            text_color = "#7D593A"
-            btn_bg = "#DCE597"
-            btn_text = "#7D593A"
-            btn_hover = "#ECF5A7"
-            section_bg = "#FFFFFF"
-            link_color = "#B48555"
-
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {bg_color};
-            }}
-            QLabel {{
-                color: {text_color};
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                line-height: 1.5;
-            }}
-            QLabel.h1 {{
-                font-family: '{self.title_font}', monospace;
-                font-size: 20px;
-                color: {text_color};
-                margin-bottom: 15px;
-            }}
-            QLabel.h2 {{
-                font-family: '{self.title_font}', monospace;
-                font-size: 16px;
-                color: {text_color};
-                margin-top: 0px;
-                margin-bottom: 8px;
-            }}
-            QLabel.body {{
-                font-size: 14px;
-                color: {text_color};
-            }}
-            QFrame.section {{
-                background-color: {section_bg};
-                border-radius: 12px;
-                padding: 15px;
-                margin-bottom: 10px;
-            }}
-            QPushButton {{
-                background-color: {btn_bg};
-                color: {btn_text};
-                border: 1px solid {btn_bg};
-                border-radius: 20px; /* Pill shape */
-                padding: 0px 24px;
-                font-size: 14px;
-                font-weight: 700;
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                min-height: 40px;
-                max-height: 40px;
-            }}
-            QPushButton:hover {{
-                background-color: {btn_hover};
-                border-color: {btn_hover};
-            }}
-            QScrollArea {{
-                border: none;
-                background-color: transparent;
-            }}
-            QWidget#scrollContent {{
-                background-color: transparent;
-            }}
-        """)
+        theme.apply_stylesheet(self, "instructions", self.title_font)
+        link_color = theme.get_palette()["link"]
         
         # Main Layout
         main_layout = QVBoxLayout()
@@ -214,11 +138,8 @@ class InstructionsDialog(QDialog):
 
     def open_browser(self, target_url):
         # Open in add-on browser window
-        if not hasattr(mw, "lofi_window"):
-            mw.lofi_window = LofiWindow(mw)
-        
-        mw.lofi_window.show()
-        mw.lofi_window.activateWindow()
+        from . import show_lofi
+        show_lofi()
         
         # Navigate to URL
         if hasattr(mw.lofi_window, "browser"):
@@ -1,95 +1,49 @@
-from aqt import mw
 from aqt.qt import *
 from aqt.utils import showInfo
 
 try:
-    from aqt.qt import QWebEngineView, QWebEngineProfile, QWebEnginePage, QWebEngineSettings
+    from aqt.qt import QWebEngineView
 except ImportError:
     # Fallback for older Anki versions or specific builds
     QWebEngineView = None
-    QWebEngineProfile = None
-    QWebEnginePage = None
-    QWebEngineSettings = None
 
-import os
-import shutil
+from . import perf_log, profile_manager
+from .config_service import get_config
+from .power_manager import PowerManager
+from .renderer_watchdog import RendererWatchdog
 
 class LofiWindow(QMainWindow):
-    def cleanup_cache(self, path):
-        if os.path.exists(path):
-            try:
-                shutil.rmtree(path)
-            except Exception as e:
-                print(f"Failed to clean cache: {e}")
-
+    @perf_log.timed("window_init")
     def __init__(self, parent=None):
         super(LofiWindow, self).__init__(parent)
         self.setWindowTitle("lofi.town")
         self.resize(1100, 750)
 
         # Ensure the window stays on top if desired
-        addon_id = mw.addonManager.addonFromModule(__name__)
-        config = mw.addonManager.getConfig(addon_id)
-        if config and config.get("always_on_top", False):
+        if get_config().always_on_top:
             self.setWindowFlags(self.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
+        get_config().subscribe(self.on_config_changed)
 
         if QWebEngineView is None:
             showInfo("QWebEngineView is not supported on this Anki version.")
             return
 
         self.browser = QWebEngineView()
-        
-        # Enable persistent cookies/storage so you stay logged in
-        addon_dir = os.path.dirname(__file__)
-        storage_path = os.path.join(addon_dir, "user_data")
-        if not os.path.exists(storage_path):
-            os.makedirs(storage_path)
-
-        profile = QWebEngineProfile("LofiTownProfile", self.browser)
-        # Set User Agent to Chrome to ensure standard browser behavior
-        profile.setHttpUserAgent("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        profile.setPersistentStoragePath(storage_path)
-
-        # Separate cache path so we can clean it independently from cookies/storage
-        cache_path = os.path.join(addon_dir, "cache_trash")
-        self.cleanup_cache(cache_path)
-        
-        # Clean up legacy cache folders from previous versions if they exist in user_data
-        for legacy_folder in ["GPUCache", "DawnCache", "VideoDecodeStats", "ShaderCache", "Code Cache"]:
-            self.cleanup_cache(os.path.join(storage_path, legacy_folder))
 
-        profile.setCachePath(cache_path)
-        
-        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
-        profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.MemoryHttpCache)
+        # Time every navigation, including reloads and recycled pages
+        self.load_timer = perf_log.SpanTimer("page_load")
+        self.browser.loadStarted.connect(self.load_timer.start)
+        self.browser.loadFinished.connect(self._on_load_finished)
 
-        page = QWebEnginePage(profile, self.browser)
+        # The profile (cookies, storage, cache) is shared for the whole Anki session
+        page = profile_manager.create_page(self.browser)
         self.browser.setPage(page)
-        
-        # Configure web engine settings to isolate from Anki's styles
-        if QWebEngineSettings:
-            settings = page.settings()
-            
-            # Enable essential web features
-            settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.LocalStorageEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessRemoteUrls, False)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.XSSAuditingEnabled, True)
-            
-            # Ensure proper rendering without Anki interference
-            settings.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.AutoLoadImages, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanOpenWindows, False)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanAccessClipboard, True)
-            
-            # Enable modern web features for proper display
-            settings.setAttribute(QWebEngineSettings.WebAttribute.WebGLEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.PlaybackRequiresUserGesture, False)
-            
-            # Prevent any style inheritance issues
-            settings.setAttribute(QWebEngineSettings.WebAttribute.FocusOnNavigationEnabled, True)
-            settings.setAttribute(QWebEngineSettings.WebAttribute.AllowRunningInsecureContent, False)
+
+        # Throttle or freeze rendering while the window is hidden or in the background
+        self.power = PowerManager(self, page)
+
+        # Replace the page if the renderer bloats or crashes
+        self.watchdog = RendererWatchdog(self, page)
         
         # Set a clean stylesheet for the browser widget itself to prevent Qt style leakage
         self.browser.setStyleSheet("")
@@ -107,8 +61,11 @@ class LofiWindow(QMainWindow):
         self.setCentralWidget(container)
 
     def closeEvent(self, event):
-        # Unload the page to stop music/video
-        if self.browser:
+        if hasattr(self, "power") and get_config().close_mode == "keep_alive":
+            # Mute the page now and freeze it once hidden, so reopening doesn't reload it
+            self.power.suspend()
+        elif self.browser:
+            # Unload the page to stop music/video
             self.browser.setUrl(QUrl("about:blank"))
 
         # Just hide the window instead of destroying it for faster reopening
@@ -116,11 +73,56 @@ class LofiWindow(QMainWindow):
         self.hide()
 
     def showEvent(self, event):
+        if hasattr(self, "power"):
+            # Unfreeze before navigating
+            self.power.resume()
+            self.power.update()
+
         # Reload if we are on blank page
         if self.browser and self.browser.url().toString() == "about:blank":
             self.browser.setUrl(QUrl("https://app.lofi.town/"))
         super().showEvent(event)
 
+        if hasattr(self, "power") and self.windowHandle() is not None:
+            # Hear about the window being covered; installing the same filter again is a no-op
+            self.windowHandle().installEventFilter(self.power)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if hasattr(self, "power"):
+            # The web view is only hidden after this window, and a visible page can't be frozen
+            self.power.schedule_update()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if hasattr(self, "power") and event.type() in (QEvent.Type.WindowStateChange, QEvent.Type.ActivationChange):
+            self.power.schedule_update()
+
+    def on_config_changed(self, changed):
+        """Apply settings live instead of requiring the window to be reopened."""
+        if "always_on_top" in changed:
+            was_visible = self.isVisible()
+            self.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint, get_config().always_on_top)
+            # Changing window flags hides the window
+            if was_visible:
+                self.show()
+
+        if hasattr(self, "power"):
+            self.power.on_config_changed(changed)
+
+    def _on_load_finished(self, ok):
+        url = self.browser.url().toString()
+        if url != "about:blank":
+            self.load_timer.stop(ok=ok, url=url)
+
+    def replace_page(self, page):
+        """Show a new page (already loaded on the shared profile) in place of the current one."""
+        self.browser.setPage(page)
+        if hasattr(self, "power"):
+            self.power.set_page(page)
+        else:
+            page.setAudioMuted(False)
+
     def refresh(self):
         """Reload the current page."""
         if self.browser:
@@ -0,0 +1,133 @@
+"""
+Timing of the add-on's hot paths (window open, page load, widget render, cache cleanup).
+Spans are measured with the monotonic clock and kept in a bounded ring buffer on mw; with the
+perf_log option they are also appended to user_files/perf_log.jsonl. Tools > lofi.town >
+Performance shows p50/p95 per span.
+"""
+
+from aqt import mw
+from collections import deque
+from contextlib import contextmanager
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+from .cache_utils import user_files_path
+from .config_service import get_config
+
+RING_SIZE = 2000
+LOG_FILE = "perf_log.jsonl"
+
+# Spans can be recorded from worker threads (e.g. cache cleanup)
+_write_lock = threading.Lock()
+
+
+def get_spans():
+    """The ring buffer of recorded spans, oldest first."""
+    spans = getattr(mw, "_lofi_perf_spans", None)
+    if spans is None:
+        spans = deque(maxlen=RING_SIZE)
+        # Stored on mw so measurements survive add-on reloads
+        mw._lofi_perf_spans = spans
+    return spans
+
+
+def record(name, seconds, **fields):
+    """Record a span that was timed elsewhere."""
+    entry = {"span": name, "at": round(time.time(), 3), "ms": round(seconds * 1000, 3)}
+    entry.update(fields)
+    get_spans().append(entry)
+
+    if get_config().perf_log:
+        try:
+            with _write_lock:
+                path = user_files_path(LOG_FILE)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"lofi.town: failed to write perf log: {e}")
+    return entry
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the body of a with block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, **fields)
+
+
+def timed(name):
+    """Decorator timing every call of a function. Keeps the function's name for hook registration."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class SpanTimer:
+    """For spans that start and end in different callbacks, e.g. loadStarted / loadFinished."""
+
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self, **fields):
+        if self._start is None:
+            return None
+        seconds = time.perf_counter() - self._start
+        self._start = None
+        return record(self.name, seconds, **fields)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize(spans=None):
+    """{span name: {"count", "p50_ms", "p95_ms", "max_ms"}} over the ring buffer."""
+    durations = {}
+    for entry in get_spans() if spans is None else spans:
+        durations.setdefault(entry["span"], []).append(entry["ms"])
+
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "max_ms": values[-1],
+        }
+    return summary
+
+
+def summary_html():
+    summary = summarize()
+    if not summary:
+        return "No measurements yet."
+    lines = [
+        f"<b>{name}</b>: p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms "
+        f"(max {stats['max_ms']:.1f} ms, {stats['count']} runs)"
+        for name, stats in summary.items()
+    ]
+    return "<br>".join(lines)
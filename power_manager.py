@@ -0,0 +1,272 @@
+"""
+Low-power mode for the lofi.town window.
+While the window is hidden, minimized or covered by other windows, the page is throttled
+(or frozen when nothing is playing) so music keeps going without burning CPU/GPU on animation.
+With throttle_unfocused, an unfocused window is throttled too, e.g. while Anki is reviewing.
+Also suspends the page on close so reopening is instant, discarding it after an idle timeout.
+"""
+
+from aqt import mw, gui_hooks
+from aqt.qt import *
+
+try:
+    from aqt.qt import QWebEnginePage
+except ImportError:
+    QWebEnginePage = None
+
+from . import hook_registry, process_utils
+from .config_service import get_config
+
+MODE_NORMAL = "normal"
+MODE_THROTTLED = "throttled"
+MODE_FROZEN = "frozen"
+MODE_DISCARDED = "discarded"
+
+MODE_LABELS = {
+    MODE_NORMAL: "Normal",
+    MODE_THROTTLED: "Low power (throttled)",
+    MODE_FROZEN: "Low power (frozen)",
+    MODE_DISCARDED: "Closed (discarded)",
+}
+
+DEFAULT_LOW_POWER_FPS = 5
+SAMPLE_INTERVAL_MS = 5000
+DEFAULT_KEEP_ALIVE_MINUTES = 30
+
+# Replaces requestAnimationFrame with a timer-driven version, which caps canvas/WebGL
+# render loops at the given frame rate. Audio is untouched.
+THROTTLE_JS = """
+(function(fps) {
+    if (!window.__lofiRaf) {
+        window.__lofiRaf = window.requestAnimationFrame.bind(window);
+        window.__lofiCaf = window.cancelAnimationFrame.bind(window);
+    }
+    var interval = 1000 / fps;
+    var pending = {};
+    var seq = 0;
+    window.requestAnimationFrame = function(callback) {
+        var id = ++seq;
+        pending[id] = setTimeout(function() {
+            delete pending[id];
+            window.__lofiRaf(callback);
+        }, interval);
+        return id;
+    };
+    window.cancelAnimationFrame = function(id) {
+        clearTimeout(pending[id]);
+        delete pending[id];
+    };
+})(%d);
+"""
+
+RESTORE_JS = """
+(function() {
+    if (window.__lofiRaf) {
+        window.requestAnimationFrame = window.__lofiRaf;
+        window.cancelAnimationFrame = window.__lofiCaf;
+    }
+})();
+"""
+
+
+class PowerManager(QObject):
+    """Switches the page between normal and low-power rendering and measures renderer CPU."""
+
+    def __init__(self, window, page):
+        super().__init__(window)
+        self.window = window
+        self.page = page
+        self.mode = MODE_NORMAL
+        self.meter = process_utils.CpuMeter()
+        self.suspended = False
+        self.discarded = False
+
+        # Once suspended for this long, drop the page to reclaim the renderer's memory
+        self._discard_timer = QTimer(self)
+        self._discard_timer.setSingleShot(True)
+        self._discard_timer.timeout.connect(self._discard)
+
+        # QtWebEngine won't freeze or discard a visible page, so changes made while the window
+        # is being hidden are applied from the event loop, once the view is actually hidden
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(0)
+        self._update_timer.timeout.connect(self.update)
+
+        self.load_config()
+
+        # Re-evaluate after each navigation since a new document drops the injected throttle
+        self._connect_page(self.page)
+        # Replaces the callback of a previous window, if any
+        hook_registry.register(gui_hooks.state_did_change, self._on_state_change)
+
+        if process_utils.is_supported():
+            self._sample_timer = QTimer(self)
+            self._sample_timer.setInterval(SAMPLE_INTERVAL_MS)
+            self._sample_timer.timeout.connect(self.sample)
+            self._sample_timer.start()
+
+    def _connect_page(self, page):
+        page.loadFinished.connect(self._on_load_finished)
+        page.recentlyAudibleChanged.connect(self._on_audible_changed)
+
+    def set_page(self, page):
+        """Manage a replacement page (see renderer_watchdog), which starts out active."""
+        try:
+            self.page.loadFinished.disconnect(self._on_load_finished)
+            self.page.recentlyAudibleChanged.disconnect(self._on_audible_changed)
+        except (TypeError, RuntimeError):
+            pass
+        self.sample()
+        self.page = page
+        self._connect_page(page)
+        self.mode = MODE_NORMAL
+        self.page.setAudioMuted(self.suspended)
+        self.update()
+
+    def load_config(self):
+        config = get_config()
+        self.enabled = config.low_power_mode
+        self.always_on_top = config.always_on_top
+        self.throttle_unfocused = config.throttle_unfocused
+        try:
+            self.fps = max(1, int(config.low_power_fps))
+        except (TypeError, ValueError):
+            self.fps = DEFAULT_LOW_POWER_FPS
+        try:
+            keep_alive_minutes = float(config.keep_alive_minutes)
+        except (TypeError, ValueError):
+            keep_alive_minutes = DEFAULT_KEEP_ALIVE_MINUTES
+        self._discard_timer.setInterval(int(keep_alive_minutes * 60 * 1000))
+
+    def on_config_changed(self, changed):
+        self.load_config()
+        if self.mode == MODE_THROTTLED and "low_power_fps" in changed:
+            self.page.runJavaScript(THROTTLE_JS % self.fps)
+        self.update()
+
+    def _on_state_change(self, new_state, old_state):
+        self.update()
+
+    def _on_audible_changed(self, audible):
+        self.update()
+
+    def eventFilter(self, obj, event):
+        # Installed on the window's QWindow: exposure changes when other windows cover or
+        # uncover it, on platforms that report occlusion
+        if event.type() == QEvent.Type.Expose:
+            self.schedule_update()
+        return False
+
+    def _on_load_finished(self, ok):
+        if self.mode == MODE_THROTTLED:
+            self.page.runJavaScript(THROTTLE_JS % self.fps)
+
+    def suspend(self):
+        """Mute and freeze the page instead of unloading it (the window is being closed)."""
+        self.page.setAudioMuted(True)
+        self.suspended = True
+        self._discard_timer.start()
+        # The window is still visible here; it is hidden right after
+        self.schedule_update()
+
+    def resume(self):
+        """Undo suspend(); a discarded page reloads itself when it becomes active again."""
+        if not self.suspended:
+            return
+        self._discard_timer.stop()
+        self.suspended = False
+        self.discarded = False
+        self.update()
+        self.page.setAudioMuted(False)
+
+    def _discard(self):
+        if self.suspended:
+            self.discarded = True
+            self.update()
+
+    def target_mode(self):
+        if self.suspended:
+            return MODE_DISCARDED if self.discarded else MODE_FROZEN
+
+        if not self.enabled:
+            return MODE_NORMAL
+
+        if not self.window.isVisible() or self.window.isMinimized() or self._is_occluded():
+            # A frozen page can't play audio, so only freeze when nothing is playing
+            if self.page.recentlyAudible():
+                return MODE_THROTTLED
+            return MODE_FROZEN
+
+        if self.throttle_unfocused and not self.window.isActiveWindow():
+            # Opt-in guess: out of focus, the user is reviewing or another window likely covers it
+            if mw.state == "review" or not self.always_on_top:
+                return MODE_THROTTLED
+
+        return MODE_NORMAL
+
+    def _is_occluded(self):
+        """Whether the window is fully covered; only some platforms report this (not X11)."""
+        handle = self.window.windowHandle() if hasattr(self.window, "windowHandle") else None
+        return handle is not None and not handle.isExposed()
+
+    def schedule_update(self):
+        """update() once control returns to the event loop, e.g. after the window is hidden."""
+        self._update_timer.start()
+
+    def _set_lifecycle_state(self, name):
+        """Returns whether the page is now in the state; QtWebEngine refuses e.g. to freeze a visible page."""
+        if QWebEnginePage is None or not hasattr(self.page, "setLifecycleState"):
+            return False
+        state = getattr(QWebEnginePage.LifecycleState, name)
+        self.page.setLifecycleState(state)
+        return self.page.lifecycleState() == state
+
+    def update(self):
+        """Apply the mode that matches the current window and Anki state."""
+        mode = self.target_mode()
+        if mode == self.mode:
+            return
+
+        # Close the measurement interval of the mode we are leaving
+        self.sample()
+
+        if mode == MODE_FROZEN and not self._set_lifecycle_state("Frozen"):
+            # Throttle instead; mode stays different from the target so the next update retries
+            mode = MODE_THROTTLED
+        elif mode == MODE_DISCARDED and not self._set_lifecycle_state("Discarded"):
+            mode = MODE_FROZEN if self.mode == MODE_FROZEN else MODE_THROTTLED
+        elif mode in (MODE_NORMAL, MODE_THROTTLED) and self.mode in (MODE_FROZEN, MODE_DISCARDED):
+            self._set_lifecycle_state("Active")
+
+        if mode == self.mode:
+            return
+
+        if mode == MODE_THROTTLED:
+            self.page.runJavaScript(THROTTLE_JS % self.fps)
+        elif mode == MODE_NORMAL:
+            # Also needed after FROZEN, which may have been entered from THROTTLED
+            self.page.runJavaScript(RESTORE_JS)
+
+        self.mode = mode
+
+    def sample(self):
+        pid = self.page.renderProcessPid() if hasattr(self.page, "renderProcessPid") else 0
+        self.meter.sample(pid, self.mode)
+
+    def summary(self):
+        """HTML readout of renderer CPU per mode, for the info dialog."""
+        if not process_utils.is_supported():
+            return "Renderer CPU measurement is only available on Linux."
+
+        self.sample()
+        lines = []
+        for mode, label in MODE_LABELS.items():
+            percent = self.meter.percent(mode)
+            if percent is None:
+                continue
+            lines.append(f"<b>{label}:</b> {percent:.1f}% CPU over {self.meter.minutes(mode):.1f} min")
+
+        if not lines:
+            return "No measurements yet. Keep lofi.town open for a little while and try again."
+        return "<br>".join(lines)
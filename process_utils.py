@@ -0,0 +1,93 @@
+"""
+Process statistics (CPU time, resident memory) for the web renderer, read from /proc.
+Only available on Linux; every helper returns None elsewhere.
+"""
+
+import os
+import time
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def is_supported():
+    return os.path.isdir("/proc/self")
+
+
+def cpu_seconds(pid):
+    """Total user + system CPU time used by pid, in seconds."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+
+    # The command name (field 2) may contain spaces, so split after its closing paren
+    fields = stat[stat.rfind(")") + 2:].split()
+    try:
+        utime = int(fields[11])
+        stime = int(fields[12])
+    except (IndexError, ValueError):
+        return None
+    return (utime + stime) / CLOCK_TICKS
+
+
+def rss_bytes(pid):
+    """Resident memory of pid in bytes."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            # size resident shared text lib data dt, in pages
+            resident = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident * PAGE_SIZE
+
+
+class CpuMeter:
+    """Accumulates CPU time and wall time of a process, split by label (e.g. normal / low power)."""
+
+    def __init__(self):
+        self.totals = {}
+        self._last = None
+
+    def sample(self, pid, label):
+        """Attribute the CPU used since the previous sample to label."""
+        now = time.monotonic()
+        cpu = cpu_seconds(pid)
+        if cpu is None:
+            self._last = None
+            return
+
+        if self._last is not None:
+            last_pid, last_cpu, last_time = self._last
+            # A new renderer process restarts its CPU counter, skip that interval
+            if last_pid == pid and cpu >= last_cpu:
+                cpu_total, wall_total = self.totals.get(label, (0.0, 0.0))
+                self.totals[label] = (cpu_total + cpu - last_cpu, wall_total + now - last_time)
+
+        self._last = (pid, cpu, now)
+
+    def reset(self):
+        self.totals = {}
+        self._last = None
+
+    def percent(self, label):
+        """Average CPU usage for label as a percentage of one core, or None if not measured."""
+        cpu_total, wall_total = self.totals.get(label, (0.0, 0.0))
+        if wall_total <= 0:
+            return None
+        return 100.0 * cpu_total / wall_total
+
+    def minutes(self, label):
+        return self.totals.get(label, (0.0, 0.0))[1] / 60.0
@@ -0,0 +1,175 @@
+"""
+Shared web profile for lofi.town.
+The profile is created once per Anki process and reused by every window and add-on reload.
+Optionally pre-warms Chromium on an idle timer so the first open doesn't pay its startup cost.
+"""
+
+from aqt import mw
+from aqt.qt import *
+
+try:
+    from aqt.qt import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
+except ImportError:
+    # Fallback for older Anki versions or specific builds
+    QWebEngineProfile = None
+    QWebEnginePage = None
+    QWebEngineSettings = None
+
+import os
+
+from . import audio_cache, cache_utils, perf_log, request_filter
+from .config_service import get_config
+
+PROFILE_NAME = "LofiTownProfile"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+LEGACY_CACHE_FOLDERS = ["GPUCache", "DawnCache", "VideoDecodeStats", "ShaderCache", "Code Cache"]
+
+# Wait until Anki has settled after opening the profile before starting Chromium
+PREWARM_DELAY_MS = 3000
+
+
+def is_supported():
+    return QWebEngineProfile is not None
+
+
+def get_profile():
+    """Return the process-wide lofi.town profile, creating it on first use."""
+    profile = getattr(mw, "_lofi_profile", None)
+    if profile is None:
+        profile = _create_profile()
+        # Stored on mw so it survives add-on reloads
+        mw._lofi_profile = profile
+    return profile
+
+
+def _create_profile():
+    config = get_config()
+
+    # Enable persistent cookies/storage so you stay logged in
+    addon_dir = os.path.dirname(__file__)
+    storage_path = os.path.join(addon_dir, "user_data")
+    if not os.path.exists(storage_path):
+        os.makedirs(storage_path)
+
+    # Parented to mw so the profile outlives any single window
+    profile = QWebEngineProfile(PROFILE_NAME, mw)
+    # Set User Agent to Chrome to ensure standard browser behavior
+    profile.setHttpUserAgent(USER_AGENT)
+    profile.setPersistentStoragePath(storage_path)
+
+    # Separate cache path so we can clean it independently from cookies/storage
+    cache_path = os.path.join(addon_dir, "cache_trash")
+    trash_paths = [cache_utils.move_to_trash(cache_path)]
+
+    # Clean up legacy cache folders from previous versions if they exist in user_data
+    for legacy_folder in LEGACY_CACHE_FOLDERS:
+        trash_paths.append(cache_utils.move_to_trash(os.path.join(storage_path, legacy_folder)))
+
+    start_background_cleanup([path for path in trash_paths if path], addon_dir, storage_path)
+
+    cache_mode, cache_max_bytes = cache_utils.get_cache_settings(config)
+    if cache_mode == cache_utils.CACHE_MODE_DISK:
+        # Keep JS bundles, sprites and audio between sessions, but never past the size cap.
+        # Chromium evicts the least recently used entries itself, including when the cap was
+        # lowered since the last session, so nothing has to walk the folder on the GUI thread.
+        disk_cache_path = cache_utils.user_files_path("http_cache")
+        profile.setCachePath(disk_cache_path)
+        profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+        profile.setHttpCacheMaximumSize(cache_max_bytes)
+    else:
+        profile.setCachePath(cache_path)
+        profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.MemoryHttpCache)
+
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+
+    # Keep trackers from competing with the app's own downloads, and replay music from disk
+    audio_cache.start()
+    request_filter.install(profile)
+    return profile
+
+
+def start_background_cleanup(trash_paths, *folders):
+    """Delete trash folders (plus leftovers from earlier sessions) on a worker thread."""
+    paths = list(trash_paths)
+    for folder in folders:
+        for path in cache_utils.find_trash(folder):
+            if path not in paths:
+                paths.append(path)
+
+    if not paths:
+        return
+
+    def on_done(future):
+        try:
+            removed, removed_bytes, elapsed = future.result()
+        except Exception as e:
+            print(f"Failed to clean cache: {e}")
+            return
+        print(f"lofi.town: cleaned {removed}/{len(paths)} cache folders "
+              f"({removed_bytes / (1024 * 1024):.1f} MB) in {elapsed:.2f}s")
+        perf_log.record("cache_cleanup", elapsed, folders=removed, mb=round(removed_bytes / (1024 * 1024), 1))
+
+    mw.taskman.run_in_background(lambda: cache_utils.delete_paths(paths), on_done)
+
+
+def create_page(parent):
+    """Return a configured page on the shared profile, reusing the pre-warmed one if available."""
+    page = getattr(mw, "_lofi_warm_page", None)
+    if page is not None:
+        mw._lofi_warm_page = None
+        page.setParent(parent)
+        return page
+
+    page = QWebEnginePage(get_profile(), parent)
+    configure_page(page)
+    return page
+
+
+def configure_page(page):
+    """Configure web engine settings to isolate the page from Anki's styles."""
+    if not QWebEngineSettings:
+        return
+
+    settings = page.settings()
+
+    # Enable essential web features
+    settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.LocalStorageEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessRemoteUrls, False)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.XSSAuditingEnabled, True)
+
+    # Ensure proper rendering without Anki interference
+    settings.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.AutoLoadImages, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanOpenWindows, False)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanAccessClipboard, True)
+
+    # Enable modern web features for proper display
+    settings.setAttribute(QWebEngineSettings.WebAttribute.WebGLEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.PlaybackRequiresUserGesture, False)
+
+    # Prevent any style inheritance issues
+    settings.setAttribute(QWebEngineSettings.WebAttribute.FocusOnNavigationEnabled, True)
+    settings.setAttribute(QWebEngineSettings.WebAttribute.AllowRunningInsecureContent, False)
+
+
+def prewarm():
+    """Create the profile and a blank page so Chromium's processes are already running."""
+    if not is_supported() or hasattr(mw, "lofi_window"):
+        return
+    if getattr(mw, "_lofi_warm_page", None) is not None:
+        return
+
+    page = QWebEnginePage(get_profile(), mw)
+    configure_page(page)
+    # Loading any URL spawns the renderer process
+    page.setUrl(QUrl("about:blank"))
+    mw._lofi_warm_page = page
+
+
+def schedule_prewarm():
+    """profile_did_open hook: pre-warm Chromium once Anki is idle, if enabled."""
+    if not get_config().prewarm_profile:
+        return
+    QTimer.singleShot(PREWARM_DELAY_MS, prewarm)
@@ -1,52 +1,245 @@
 """
-Hot-reload utility for Focumon add-on development.
+Hot-reload utility for lofi.town add-on development.
 Allows reloading of modules without restarting Anki.
+
+Only modules whose source changed since the last snapshot are reloaded, together with the
+modules that import them at load time, in dependency order. Mtimes are checked first and
+files are only hashed when their mtime moved, so an unchanged add-on costs a few stat calls.
 """
 
 from aqt import mw
-from aqt.utils import showInfo
+import hashlib
 import importlib
+import os
 import sys
+import time
+
+from . import hook_registry
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = __name__.rsplit('.', 1)[0]
+
+# Never reloaded: __init__ builds the menu, and reloading would add it a second time
+SKIP_MODULES = {"__init__"}
+
+
+def discover_modules():
+    """Names of the add-on's top-level modules, e.g. ['cache_utils', 'config_service', ...]."""
+    return sorted(
+        filename[:-3]
+        for filename in os.listdir(ADDON_DIR)
+        if filename.endswith(".py") and filename[:-3] not in SKIP_MODULES
+    )
+
 
+def _module_path(name):
+    return os.path.join(ADDON_DIR, f"{name}.py")
+
+
+def _load_time_imports(tree):
+    """Import statements executed when the module loads, i.e. not inside functions."""
+    import ast
+
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            pending.extend(ast.iter_child_nodes(node))
+
+
+def build_graph(names):
+    """
+    Map each module to the add-on modules it imports at load time.
+    Imports inside functions are skipped: they look the module up again on every call,
+    so they pick up a reloaded module without the importer being reloaded.
+    """
+    known = set(names)
+    return {name: (_module_imports(name) & known) - {name} for name in names}
 
-def reload_modules():
+
+def _module_imports(name):
+    """Relative imports of one module, parsed again only when its file changes."""
+    import ast
+
+    # Stored on mw so parsed results survive reloading this module
+    parsed = getattr(mw, "_lofi_import_graph", None)
+    if parsed is None:
+        parsed = {}
+        mw._lofi_import_graph = parsed
+
+    try:
+        stat = os.stat(_module_path(name))
+        with open(_module_path(name), "r", encoding="utf-8") as f:
+            state = (stat.st_mtime_ns, stat.st_size)
+            if name in parsed and parsed[name][0] == state:
+                return parsed[name][1]
+            tree = ast.parse(f.read(), filename=f"{name}.py")
+    except (OSError, SyntaxError):
+        return set()
+
+    deps = set()
+    for node in _load_time_imports(tree):
+        if not isinstance(node, ast.ImportFrom) or node.level != 1:
+            continue
+        if node.module:
+            # from .module import name
+            deps.add(node.module.split(".")[0])
+        else:
+            # from . import module
+            deps.update(alias.name for alias in node.names)
+    parsed[name] = (state, deps)
+    return deps
+
+
+def _file_state(name, previous=None, hash_file=True):
+    """
+    (mtime_ns, size, sha1) of a module's source, or None if it is missing.
+    The previous hash is reused while mtime and size are unchanged; without hash_file it is None.
+    """
+    try:
+        stat = os.stat(_module_path(name))
+    except OSError:
+        return None
+    if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size) and (previous[2] or not hash_file):
+        return previous
+    digest = None
+    if hash_file:
+        with open(_module_path(name), "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+    return (stat.st_mtime_ns, stat.st_size, digest)
+
+
+def take_snapshot(names=None, hash_files=True):
+    """
+    Record the current state of every module file; the next reload compares against it.
+    hash_files=False keeps this to one stat call per module, but then a file that was only
+    touched counts as changed on the next reload, since its earlier content is unknown.
     """
-    Reload settings, stats_dialog, and deck_widget modules.
+    if names is None:
+        names = discover_modules()
+    previous = getattr(mw, "_lofi_reload_snapshot", None) or {}
+    # Stored on mw so it survives reloading this module
+    mw._lofi_reload_snapshot = {
+        name: _file_state(name, previous.get(name), hash_files) for name in names
+    }
+    return mw._lofi_reload_snapshot
+
+
+def changed_modules(names):
+    """Modules whose source differs from the snapshot. Without a snapshot, every module counts."""
+    snapshot = getattr(mw, "_lofi_reload_snapshot", None)
+    if snapshot is None:
+        return set(names)
+
+    changed = set()
+    for name in names:
+        old = snapshot.get(name)
+        new = _file_state(name, old)
+        if old is None or new is None:
+            changed.add(name)
+        elif old[:2] != new[:2] and (old[2] is None or old[2] != new[2]):
+            # Touched files with identical content don't count
+            changed.add(name)
+    return changed
+
+
+def reload_order(changed, graph):
+    """
+    The changed modules plus everything that imports them, dependencies first.
+    Modules that aren't loaded yet are left out; they import the new code when first used.
+    """
+    dependents = {name: set() for name in graph}
+    for name, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(name)
+
+    affected = set()
+    pending = list(changed)
+    while pending:
+        name = pending.pop()
+        if name in affected:
+            continue
+        affected.add(name)
+        pending.extend(dependents.get(name, ()))
+
+    affected = {name for name in affected if f"{PACKAGE_NAME}.{name}" in sys.modules}
+
+    # Kahn's algorithm over the affected subgraph, alphabetical among ready modules
+    remaining = {name: graph.get(name, set()) & affected for name in affected}
+    order = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps)
+        if not ready:
+            # Import cycle; reload what's left in name order
+            ready = sorted(remaining)
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def reload_changed(force=False):
+    """
+    Reload modules changed since the last snapshot, and their dependents.
+    Returns a list of (module name, seconds) in reload order.
+    """
+    names = discover_modules()
+    changed = set(names) if force else changed_modules(names)
+    if not changed:
+        return []
+
+    timings = []
+    for name in reload_order(changed, build_graph(names)):
+        module = sys.modules[f"{PACKAGE_NAME}.{name}"]
+        start = time.perf_counter()
+        # The reloaded module registers its hooks again
+        hook_registry.unregister_module(name)
+        importlib.reload(module)
+        timings.append((name, time.perf_counter() - start))
+
+    take_snapshot(names)
+
+    reloaded = {name for name, _seconds in timings}
+    if "deck_widget" in reloaded:
+        # Swap the widget's hooks for the reloaded functions
+        sys.modules[f"{PACKAGE_NAME}.deck_widget"].init_deck_widget()
+    return timings
+
+
+def format_timings(timings):
+    if not timings:
+        return "No changes to reload."
+    total = sum(seconds for _name, seconds in timings)
+    lines = [f"Reloaded {len(timings)} module(s) in {total * 1000:.1f} ms:"]
+    lines.extend(f"{name}: {seconds * 1000:.1f} ms" for name, seconds in timings)
+    return "<br>".join(lines)
+
+
+def reload_modules(force=False):
+    """
+    Reload the add-on modules that changed on disk and refresh the deck widget.
     This allows changes to be reflected without restarting Anki.
     """
     try:
-        # Get the package name
-        package_name = __name__.rsplit('.', 1)[0]  # Gets 'Focumon' or the addon folder name
-        
-        # List of modules to reload
-        modules_to_reload = [
-            'settings',
-            'stats_dialog', 
-            'deck_widget',
-            'scrapers',  # Also reload scrapers as it's used by deck_widget
-            'font_utils'  # Reload font utils as well
-        ]
-        
-        for module_name in modules_to_reload:
-            full_module_name = f"{package_name}.{module_name}"
-            
-            if full_module_name in sys.modules:
-                module = sys.modules[full_module_name]
-                importlib.reload(module)
-
-        
+        timings = reload_changed(force)
+        print(f"lofi.town: {hook_registry.hook_count()} hooks installed after reload")
+
         # Clear the deck widget cache
-        deck_widget_module = sys.modules.get(f"{package_name}.deck_widget")
+        deck_widget_module = sys.modules.get(f"{PACKAGE_NAME}.deck_widget")
         if deck_widget_module and hasattr(deck_widget_module, 'reset_cache'):
             deck_widget_module.reset_cache()
-        
+
         # Refresh the deck browser to show changes
         if mw.state == "deckBrowser":
             mw.deckBrowser.refresh()
-        
+
         from .ui_utils import show_custom_info
-        show_custom_info("Successfully reloaded profile information", title="Refresh")
-        
+        show_custom_info(f"Successfully reloaded profile information<br><br>{format_timings(timings)}", title="Refresh")
+
     except Exception as e:
         from .ui_utils import show_custom_info
         show_custom_info(f"Error reloading modules:<br><br>{str(e)}<br><br>You may need to restart Anki.", title="Error")
@@ -0,0 +1,229 @@
+"""
+Renderer watchdog for the lofi.town window.
+Samples the renderer process's resident memory and replaces the page with a fresh one when it
+grows past renderer_max_mb, or when the renderer crashes. The replacement is loaded in the
+background on the same profile (so the login and storage are kept) and swapped in once ready.
+Repeated recycles back off exponentially, and every event is appended to a JSONL log.
+"""
+
+from aqt.qt import *
+
+try:
+    from aqt.qt import QWebEnginePage
+except ImportError:
+    QWebEnginePage = None
+
+import json
+import os
+import time
+
+from . import process_utils, profile_manager
+from .cache_utils import user_files_path
+from .config_service import get_config
+
+CHECK_INTERVAL_MS = 30 * 1000
+LOG_FILE = "watchdog_log.jsonl"
+LOG_MAX_BYTES = 256 * 1024
+
+# Delay before the nth consecutive recycle: 5s, 10s, 20s ... capped at 10 minutes
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 10 * 60
+# A recycle this long after the previous one starts the backoff over
+BACKOFF_RESET_SECONDS = 30 * 60
+
+# Give up on a replacement page that hasn't finished loading after this long
+LOAD_TIMEOUT_MS = 60 * 1000
+
+DEFAULT_URL = "https://app.lofi.town/"
+
+
+class Backoff:
+    """Exponential delay between recycles that happen close together."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.last = None
+
+    def next_delay(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.last is not None and now - self.last > BACKOFF_RESET_SECONDS:
+            self.attempts = 0
+        delay = 0 if self.attempts == 0 else min(BACKOFF_BASE_SECONDS * 2 ** (self.attempts - 1), BACKOFF_MAX_SECONDS)
+        self.attempts += 1
+        self.last = now + delay
+        return delay
+
+
+class EventLog:
+    """Append-only JSONL log, trimmed to its newest half once it passes max_bytes."""
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def append(self, event, **fields):
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "event": event}
+        entry.update(fields)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            if os.path.getsize(self.path) > self.max_bytes:
+                self._trim()
+        except OSError as e:
+            print(f"lofi.town: failed to write watchdog log: {e}")
+        return entry
+
+    def _trim(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(lines[len(lines) // 2:])
+
+    def read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+
+class RendererWatchdog(QObject):
+    def __init__(self, window, page):
+        super().__init__(window)
+        self.window = window
+        self.page = None
+        self.pending_page = None
+        self.recycles = 0
+        self.peak_rss = 0
+        self.backoff = Backoff()
+        self.log = EventLog(user_files_path(LOG_FILE))
+
+        self._check_timer = QTimer(self)
+        self._check_timer.setInterval(CHECK_INTERVAL_MS)
+        self._check_timer.timeout.connect(self.check)
+
+        self._recycle_timer = QTimer(self)
+        self._recycle_timer.setSingleShot(True)
+        self._recycle_timer.timeout.connect(self._start_recycle)
+        self._recycle_reason = None
+
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(LOAD_TIMEOUT_MS)
+        self._load_timer.timeout.connect(self._abandon_pending_page)
+
+        self.watch(page)
+        if process_utils.is_supported():
+            self._check_timer.start()
+
+    def watch(self, page):
+        """Follow a new page (after a recycle)."""
+        if self.page is not None:
+            try:
+                self.page.renderProcessTerminated.disconnect(self._on_render_process_terminated)
+            except (TypeError, RuntimeError):
+                pass
+        self.page = page
+        page.renderProcessTerminated.connect(self._on_render_process_terminated)
+
+    def max_bytes(self):
+        try:
+            max_mb = int(get_config().renderer_max_mb)
+        except (TypeError, ValueError):
+            return 0
+        return max(0, max_mb) * 1024 * 1024
+
+    def check(self):
+        """Timer tick: recycle the page if the renderer is over the memory ceiling."""
+        limit = self.max_bytes()
+        pid = self.page.renderProcessPid() if hasattr(self.page, "renderProcessPid") else 0
+        rss = process_utils.rss_bytes(pid)
+        if rss is None:
+            # No renderer (frozen, discarded, not loaded yet) or not on Linux
+            return
+        self.peak_rss = max(self.peak_rss, rss)
+        power = getattr(self.window, "power", None)
+        if power is not None and power.suspended:
+            # A closed window's page is discarded by the power manager after a while anyway
+            return
+        if limit and rss > limit:
+            self.schedule_recycle("memory", pid=pid, rss_mb=round(rss / (1024 * 1024)))
+
+    def _on_render_process_terminated(self, status, exit_code):
+        status_name = getattr(status, "name", str(status))
+        if status_name == "NormalTerminationStatus":
+            return
+        self.schedule_recycle("crash", status=status_name, exit_code=exit_code)
+
+    def schedule_recycle(self, reason, **details):
+        if QWebEnginePage is None or self.pending_page is not None or self._recycle_timer.isActive():
+            return
+        delay = self.backoff.next_delay()
+        self.log.append(reason, delay_s=delay, **details)
+        self._recycle_reason = reason
+        self._recycle_timer.start(int(delay * 1000))
+
+    def _start_recycle(self):
+        """Load a replacement page in the background; it is swapped in once loaded."""
+        if self.pending_page is not None:
+            return
+        url = self.page.url() if self.page is not None else QUrl()
+        if not url.isValid() or url.toString() in ("", "about:blank"):
+            url = QUrl(DEFAULT_URL)
+
+        page = QWebEnginePage(profile_manager.get_profile(), self.window)
+        profile_manager.configure_page(page)
+        # Stay quiet until it replaces the current page
+        page.setAudioMuted(True)
+        page.loadFinished.connect(self._on_pending_page_loaded)
+        self.pending_page = page
+        self._load_timer.start()
+        page.setUrl(url)
+
+    def _on_pending_page_loaded(self, ok):
+        page = self.pending_page
+        if page is None:
+            return
+        if not ok:
+            self._abandon_pending_page()
+            return
+
+        self._load_timer.stop()
+        page.loadFinished.disconnect(self._on_pending_page_loaded)
+        self.pending_page = None
+
+        old_page = self.page
+        self.window.replace_page(page)
+        self.watch(page)
+        if old_page is not None:
+            old_page.setAudioMuted(True)
+            old_page.deleteLater()
+
+        self.recycles += 1
+        self.log.append("recycled", reason=self._recycle_reason, recycles=self.recycles)
+
+    def _abandon_pending_page(self):
+        page = self.pending_page
+        if page is None:
+            return
+        self._load_timer.stop()
+        self.pending_page = None
+        page.deleteLater()
+        self.log.append("recycle_failed", reason=self._recycle_reason)
+        # Try again later, further out each time
+        self.schedule_recycle(self._recycle_reason)
+
+    def summary(self):
+        """HTML readout for the usage dialog."""
+        if not process_utils.is_supported():
+            return ""
+        pid = self.page.renderProcessPid() if hasattr(self.page, "renderProcessPid") else 0
+        rss = process_utils.rss_bytes(pid)
+        lines = []
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+            lines.append(f"<b>Renderer memory:</b> {rss / (1024 * 1024):.0f} MB (peak {self.peak_rss / (1024 * 1024):.0f} MB)")
+        if self.recycles:
+            lines.append(f"<b>Page recycled:</b> {self.recycles} time(s) this session")
+        return "<br>".join(lines)
@@ -0,0 +1,164 @@
+"""
+Blocks analytics, ad and tracker requests made by the lofi.town page, and sends audio
+requests to the local audio cache (see audio_cache.py).
+The interceptor is installed once on the shared web profile. Blocked hosts are kept in a set
+of domain suffixes, so each request costs one set lookup per label of its host name.
+Counts of blocked requests (and a rough estimate of the bytes they would have used) are kept
+for the session and shown under Tools > lofi.town > Power Usage.
+"""
+
+from aqt import mw
+from aqt.qt import *
+
+try:
+    from aqt.qt import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+except ImportError:
+    QWebEngineUrlRequestInterceptor = None
+    QWebEngineUrlRequestInfo = None
+
+from . import audio_cache
+from .config_service import get_config
+
+# Blocked along with all of their subdomains when block_trackers is on
+DEFAULT_BLOCKLIST = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "hotjar.com",
+    "hotjar.io",
+    "clarity.ms",
+    "mixpanel.com",
+    "amplitude.com",
+    "segment.io",
+    "cdn.segment.com",
+    "api.segment.io",
+    "fullstory.com",
+    "posthog.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "adnxs.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+]
+
+# Rough size of a blocked response by resource type, used for the bytes-saved estimate
+ESTIMATED_BYTES = {
+    "ResourceTypeScript": 60 * 1024,
+    "ResourceTypeSubFrame": 120 * 1024,
+    "ResourceTypeStylesheet": 10 * 1024,
+    "ResourceTypeImage": 1024,
+    "ResourceTypePing": 512,
+    "ResourceTypeXhr": 2 * 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 2 * 1024
+
+
+class DomainBlocklist:
+    """Set of blocked domains; a host matches if it or any of its parent domains is listed."""
+
+    def __init__(self, domains=()):
+        self._domains = {_normalize(domain) for domain in domains if _normalize(domain)}
+
+    def __len__(self):
+        return len(self._domains)
+
+    def matches(self, host):
+        host = _normalize(host)
+        while host:
+            if host in self._domains:
+                return True
+            # "a.b.example.com" -> "b.example.com" -> "example.com" -> "com"
+            _, _, host = host.partition(".")
+        return False
+
+
+def _normalize(domain):
+    return domain.strip().strip(".").lower()
+
+
+def build_blocklist(config):
+    """Blocklist for the current config: the defaults (if enabled) plus the user's entries."""
+    domains = list(DEFAULT_BLOCKLIST) if config.block_trackers else []
+    domains.extend(config.blocklist or [])
+    return DomainBlocklist(domains)
+
+
+def _resource_type_name(info):
+    resource_type = info.resourceType()
+    return getattr(resource_type, "name", str(resource_type))
+
+
+class RequestStats:
+    """Per-session counters of blocked requests."""
+
+    def __init__(self):
+        self.blocked = 0
+        self.estimated_bytes = 0
+        self.hosts = {}
+
+    def record(self, host, resource_type):
+        self.blocked += 1
+        self.estimated_bytes += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+        self.hosts[host] = self.hosts.get(host, 0) + 1
+
+
+_InterceptorBase = QWebEngineUrlRequestInterceptor or QObject
+
+
+class LofiRequestInterceptor(_InterceptorBase):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stats = RequestStats()
+        self.blocklist = build_blocklist(get_config())
+
+    def interceptRequest(self, info):
+        # Never block the app itself, whatever the blocklist says
+        if _resource_type_name(info) == "ResourceTypeMainFrame":
+            return
+
+        host = info.requestUrl().host()
+        if self.blocklist.matches(host):
+            info.block(True)
+            self.stats.record(host, _resource_type_name(info))
+            return
+
+        # Music is served from the add-on's disk cache once it has been played
+        proxy_url = audio_cache.proxy_url_for(info.requestUrl().toString(), _resource_type_name(info))
+        if proxy_url:
+            info.redirect(QUrl(proxy_url))
+
+    def on_config_changed(self, changed):
+        if changed & {"block_trackers", "blocklist"}:
+            self.blocklist = build_blocklist(get_config())
+
+
+def install(profile):
+    """Install the interceptor on the profile. Returns it, or None if not supported."""
+    if QWebEngineUrlRequestInterceptor is None:
+        return None
+
+    # Parented to the profile, which keeps it alive as long as the profile uses it
+    interceptor = LofiRequestInterceptor(profile)
+    profile.setUrlRequestInterceptor(interceptor)
+    get_config().subscribe(interceptor.on_config_changed)
+    mw._lofi_request_interceptor = interceptor
+    return interceptor
+
+
+def summary():
+    """Text for the usage dialog, or an empty string if nothing was blocked."""
+    interceptor = getattr(mw, "_lofi_request_interceptor", None)
+    if interceptor is None or not interceptor.stats.blocked:
+        return ""
+    stats = interceptor.stats
+    top_hosts = sorted(stats.hosts.items(), key=lambda item: item[1], reverse=True)[:3]
+    hosts = ", ".join(f"{host} ({count})" for host, count in top_hosts)
+    return (
+        f"<b>Blocked requests:</b> {stats.blocked} "
+        f"(~{stats.estimated_bytes / 1024:.0f} KB saved)<br>{hosts}"
+    )
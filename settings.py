@@ -1,13 +1,34 @@
-from aqt import mw
+from aqt import gui_hooks
 from aqt.qt import *
-from aqt.utils import showInfo
-import os
+import time
+
+from . import font_utils, hook_registry, image_utils, theme
+from .config_service import get_config
 
 class ToggleSwitch(QCheckBox):
     """Custom animated toggle switch widget"""
+
+    WIDTH = 44
+    HEIGHT = 24
+    THUMB_SIZE = 20
+    PADDING = 2
+    THUMB_RANGE = WIDTH - THUMB_SIZE - PADDING * 2
+
+    # Resolution of the animation; each step has a pre-rendered track
+    STEPS = 24
+
+    # Pre-rendered frames shared by every switch, keyed by (is_dark, device pixel ratio)
+    _sprites = {}
+    _is_dark = None
+
+    # Frame-time counter for paintEvent, reported by tests/bench_hot_paths.py
+    paint_count = 0
+    paint_seconds = 0.0
+    paint_max_seconds = 0.0
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setFixedSize(44, 24)
+        self.setFixedSize(self.WIDTH, self.HEIGHT)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         
         # Animation state
@@ -39,41 +60,97 @@ class ToggleSwitch(QCheckBox):
         self._animation.setEndValue(1.0 if new_state else 0.0)
         self._animation.start()
         event.accept()
-        
-    def paintEvent(self, event):
-        painter = QPainter(self)
+
+    @classmethod
+    def on_theme_change(cls):
+        """Resolve the theme again; sprites for the new theme are rendered on next paint."""
+        cls._is_dark = theme.is_dark()
+
+    @classmethod
+    def frame_stats(cls):
+        """Number of frames painted and their average / worst paint time in milliseconds."""
+        average = cls.paint_seconds / cls.paint_count if cls.paint_count else 0.0
+        return {
+            "frames": cls.paint_count,
+            "average_ms": average * 1000,
+            "max_ms": cls.paint_max_seconds * 1000,
+        }
+
+    @classmethod
+    def reset_frame_stats(cls):
+        cls.paint_count = 0
+        cls.paint_seconds = 0.0
+        cls.paint_max_seconds = 0.0
+
+    @classmethod
+    def render_sprites(cls, dark, ratio):
+        """Render every track colour of the animation plus the thumb, once per theme and ratio."""
+        palette = theme.DARK_PALETTE if dark else theme.LIGHT_PALETTE
+        off_color = QColor(palette["toggle_off"])
+        on_color = QColor(palette["accent"])
+
+        def new_pixmap(width, height):
+            pixmap = QPixmap(int(width * ratio), int(height * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            return pixmap
+
+        tracks = []
+        positions = []
+        for step in range(cls.STEPS + 1):
+            t = step / cls.STEPS
+            track_color = QColor(
+                int(off_color.red() + (on_color.red() - off_color.red()) * t),
+                int(off_color.green() + (on_color.green() - off_color.green()) * t),
+                int(off_color.blue() + (on_color.blue() - off_color.blue()) * t),
+            )
+            track = new_pixmap(cls.WIDTH, cls.HEIGHT)
+            painter = QPainter(track)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(track_color)
+            painter.drawRoundedRect(QRectF(0, 0, cls.WIDTH, cls.HEIGHT), cls.HEIGHT / 2, cls.HEIGHT / 2)
+            painter.end()
+            tracks.append(track)
+            positions.append(QPointF(cls.PADDING + cls.THUMB_RANGE * t, cls.PADDING))
+
+        thumb = new_pixmap(cls.THUMB_SIZE, cls.THUMB_SIZE)
+        painter = QPainter(thumb)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Detect theme
-        is_dark = mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
-        
-        # Define base colors
-        if is_dark:
-            off_color = QColor("#3A3A3A")
-        else:
-            off_color = QColor("#E5D09D") # Using secondary color for off state
-        on_color = QColor("#DCE597") # Accent
-        
-        # Interpolate color based on position
-        t = self._position
-        
-        r = off_color.red() + (on_color.red() - off_color.red()) * t
-        g = off_color.green() + (on_color.green() - off_color.green()) * t
-        b = off_color.blue() + (on_color.blue() - off_color.blue()) * t
-        track_color = QColor(int(r), int(g), int(b))
-        
-        # Draw track
-        track_rect = QRectF(0, 0, 44, 24)
         painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(track_color)
-        painter.drawRoundedRect(track_rect, 12, 12)
-        
-        # Draw thumb
-        thumb_range = 44 - 20 - 4 # width - thumb_size - padding*2
-        thumb_x = 2 + (thumb_range * t)
-        thumb_rect = QRectF(thumb_x, 2, 20, 20)
         painter.setBrush(QColor("#FFFFFF"))
-        painter.drawEllipse(thumb_rect)
+        painter.drawEllipse(QRectF(0, 0, cls.THUMB_SIZE, cls.THUMB_SIZE))
+        painter.end()
+
+        return tracks, positions, thumb
+        
+    def paintEvent(self, event):
+        start = time.perf_counter()
+
+        cls = type(self)
+        if cls._is_dark is None:
+            cls.on_theme_change()
+        key = (cls._is_dark, self.devicePixelRatioF())
+        sprites = cls._sprites.get(key)
+        if sprites is None:
+            sprites = cls._sprites[key] = cls.render_sprites(*key)
+        tracks, positions, thumb = sprites
+
+        # Snap the animation position to the nearest pre-rendered step
+        step = min(max(int(self._position * self.STEPS + 0.5), 0), self.STEPS)
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, tracks[step])
+        painter.drawPixmap(positions[step], thumb)
+        painter.end()
+
+        elapsed = time.perf_counter() - start
+        cls.paint_count += 1
+        cls.paint_seconds += elapsed
+        if elapsed > cls.paint_max_seconds:
+            cls.paint_max_seconds = elapsed
+
+hook_registry.register(gui_hooks.theme_did_change, ToggleSwitch.on_theme_change)
 
 class LofiSettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -87,105 +164,19 @@ class LofiSettingsDialog(QDialog):
         self.setup_ui()
         self.load_settings()
 
+    def rebind(self, parent=None):
+        """Reuse this (pooled) dialog: show the current settings again."""
+        self.load_settings()
+
     def load_custom_font(self):
         """Load the Silkscreen-Regular font"""
-        addon_dir = os.path.dirname(__file__)
-        self.font_path = os.path.join(addon_dir, "assets", "Silkscreen-Regular.ttf")
-        
-        if os.path.exists(self.font_path):
-            font_id = QFontDatabase.addApplicationFont(self.font_path)
-            if font_id != -1:
-                families = QFontDatabase.applicationFontFamilies(font_id)
-                self.custom_font_family = families[0] if families else "Arial"
-            else:
-                self.custom_font_family = "Arial"
-        else:
-            self.custom_font_family = "Arial"
+        family = font_utils.load_custom_font("Silkscreen-Regular.ttf")
+        self.custom_font_family = "Arial" if family == "sans-serif" else family
 
     def setup_ui(self):
-        # Detect theme
-        is_dark = mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
-        
-        # Color scheme
-        bg_color = "#7D593A" if is_dark else "#F9F7E4"
-        text_color = "#F9F7E4" if is_dark else "#7D593A"
-        accent_color = "#DCE597"
-        btn_bg = "#B48555" # Secondary button bg
-        
-        # Get font name
-        font_family = self.custom_font_family
-        
         # Modern Stylesheet
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {bg_color};
-            }}
-            QLabel {{
-                font-size: 14px;
-                color: {text_color};
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-            }}
-            QLabel.section-title {{
-                font-size: 16px;
-                font-weight: 600;
-                color: {text_color};
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                padding: 4px 0px;
-            }}
-            QPushButton {{
-                background-color: {btn_bg};
-                color: #FFFFFF;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 20px;
-                font-size: 14px;
-                font-weight: 600;
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-            }}
-            QPushButton:hover {{
-                background-color: #C49565;
-            }}
-            QPushButton:pressed {{
-                background-color: #A47545;
-            }}
-            QPushButton#reportBtn {{
-                background-color: #E5D09D;
-                color: #7D593A;
-                border-radius: 18px;
-                padding: 0px 16px;
-                font-size: 13px;
-                font-weight: 600;
-                min-height: 36px;
-                max-height: 36px;
-            }}
-            QPushButton#reportBtn:hover {{
-                background-color: #F5E0AD;
-            }}
-            QPushButton#donateBtn {{
-                background-color: {accent_color};
-                color: #7D593A;
-                border: none;
-                border-radius: 18px;
-                padding: 0px 16px;
-                font-size: 13px;
-                font-weight: 600;
-                min-height: 36px;
-                max-height: 36px;
-            }}
-            QPushButton#donateBtn:hover {{
-                background-color: #ECF5A7;
-            }}
-            QPushButton#saveBtn {{
-                background-color: {accent_color};
-                color: #7D593A;
-            }}
-            QPushButton#saveBtn:hover {{
-                background-color: #ECF5A7;
-            }}
-            QPushButton#saveBtn:pressed {{
-                background-color: #CCEB87;
-            }}
-        """)
+        theme.apply_stylesheet(self, "settings")
+        text_color = theme.get_palette()["text"]
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(32, 32, 32, 32)
@@ -204,22 +195,9 @@ class LofiSettingsDialog(QDialog):
 
         # Logo (Centered)
         logo_label = QLabel()
-        addon_dir = os.path.dirname(__file__)
-        logo_path = os.path.join(addon_dir, "assets", "lofi_town_name.png")
-        if os.path.exists(logo_path):
-            pixmap = QPixmap(logo_path)
-            
-            # High DPI Scaling Logic
-            pixel_ratio = self.devicePixelRatioF()
-            target_height = 40 # Slightly larger for text logo
-            
-            # Scale to (target_height * pixel_ratio)
-            scaled_h = int(target_height * pixel_ratio)
-            scaled_pixmap = pixmap.scaledToHeight(scaled_h, Qt.TransformationMode.SmoothTransformation)
-            
-            # Set device pixel ratio
-            scaled_pixmap.setDevicePixelRatio(pixel_ratio)
-            
+        # Slightly larger for text logo, scaled for High DPI and cached across dialogs
+        scaled_pixmap = image_utils.get_pixmap("lofi_town_name.png", height=40, ratio=self.devicePixelRatioF())
+        if scaled_pixmap:
             logo_label.setPixmap(scaled_pixmap)
         logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         header_layout.addWidget(logo_label)
@@ -307,31 +285,15 @@ class LofiSettingsDialog(QDialog):
         self.setLayout(main_layout)
 
     def load_settings(self):
-        config = mw.addonManager.getConfig(__name__)
-        if config:
-            self.always_on_top_toggle.setChecked(config.get("always_on_top", False))
-            self.hide_widget_toggle.setChecked(config.get("hide_widget", False))
+        config = get_config()
+        self.always_on_top_toggle.setChecked(config.always_on_top)
+        self.hide_widget_toggle.setChecked(config.hide_widget)
 
     def save_settings(self):
-        config = mw.addonManager.getConfig(__name__)
-        if config is None:
-            config = {}
-        
-        config["always_on_top"] = self.always_on_top_toggle.isChecked()
-        config["hide_widget"] = self.hide_widget_toggle.isChecked()
-        mw.addonManager.writeConfig(__name__, config)
-        
-        # If the window is open, update it
-        if hasattr(mw, "lofi_window") and mw.lofi_window.isVisible():
-             # We need to restart the window to apply window flags
-             mw.lofi_window.close()
-             # Optionally trigger show_lofi again if we want to immediately reopen
-             # from . import show_lofi
-             # show_lofi()
-             pass
-        
-        # Refresh deck browser to apply widget visibility changes
-        if hasattr(mw, "deckBrowser") and mw.state == "deckBrowser":
-            mw.deckBrowser.refresh()
+        # The open window and the deck widget pick up the changes from the config service
+        get_config().update(
+            always_on_top=self.always_on_top_toggle.isChecked(),
+            hide_widget=self.hide_widget_toggle.isChecked(),
+        )
              
         self.accept()
@@ -0,0 +1,233 @@
+"""
+Background fetch of the player's stats for the deck widget.
+The stats page is downloaded on a worker thread with the cookies of the lofi.town web profile,
+parsed with scrapers.PageParser as it arrives, and kept for stats_ttl_minutes. The deck
+browser only ever reads the cached result; when it is stale a refresh is started and the
+widget is updated in place once it finishes.
+"""
+
+from aqt import mw
+from aqt.qt import *
+import time
+from urllib.parse import urlsplit
+
+from . import scrapers
+from .config_service import get_config
+
+FETCH_TIMEOUT_SECONDS = 10
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_TTL_MINUTES = 10
+
+# Cookies are loaded from disk asynchronously when the jar is first attached to the profile
+COOKIE_LOAD_DELAY_MS = 1000
+
+
+class CookieJar:
+    """
+    Mirror of the web profile's cookies, kept current through the cookie store's signals.
+    Cookies are stored as plain tuples so the header can be built without touching Qt objects.
+    """
+
+    def __init__(self):
+        # (domain, path, name) -> (value, secure)
+        self._cookies = {}
+        self.attached = False
+
+    def attach(self, profile):
+        self.attached = True
+        store = profile.cookieStore()
+        store.cookieAdded.connect(self._on_cookie_added)
+        store.cookieRemoved.connect(self._on_cookie_removed)
+        store.loadAllCookies()
+
+    def add(self, name, value, domain, path="/", secure=False):
+        self._cookies[(domain.lower(), path or "/", name)] = (value, secure)
+
+    def remove(self, name, domain, path="/"):
+        self._cookies.pop((domain.lower(), path or "/", name), None)
+
+    def _on_cookie_added(self, cookie):
+        self.add(
+            bytes(cookie.name()).decode("utf-8", "replace"),
+            bytes(cookie.value()).decode("utf-8", "replace"),
+            cookie.domain(),
+            cookie.path(),
+            cookie.isSecure(),
+        )
+
+    def _on_cookie_removed(self, cookie):
+        self.remove(bytes(cookie.name()).decode("utf-8", "replace"), cookie.domain(), cookie.path())
+
+    def header_for(self, url):
+        """Value of the Cookie header a browser would send to url, or an empty string."""
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        path = parts.path or "/"
+        pairs = []
+        for (domain, cookie_path, name), (value, secure) in self._cookies.items():
+            if secure and parts.scheme != "https":
+                continue
+            bare_domain = domain.lstrip(".")
+            if host != bare_domain and not host.endswith("." + bare_domain):
+                continue
+            if not path.startswith(cookie_path):
+                continue
+            pairs.append(f"{name}={value}")
+        return "; ".join(pairs)
+
+
+def get_cookie_jar():
+    """Return the shared cookie jar, attaching it to the web profile on first use."""
+    jar = getattr(mw, "_lofi_cookie_jar", None)
+    if jar is None:
+        from . import profile_manager
+
+        jar = CookieJar()
+        if profile_manager.is_supported():
+            jar.attach(profile_manager.get_profile())
+        # Stored on mw so the signal connections aren't duplicated by add-on reloads
+        mw._lofi_cookie_jar = jar
+    return jar
+
+
+def fetch_stats(url, cookie_header="", timeout=FETCH_TIMEOUT_SECONDS):
+    """
+    Download and parse the stats page. Blocking; called on a worker thread.
+    Returns {"stats": {...}, "level": "17" or None}.
+    """
+    import urllib.request
+
+    from .profile_manager import USER_AGENT
+
+    headers = {"User-Agent": USER_AGENT}
+    if cookie_header:
+        headers["Cookie"] = cookie_header
+    request = urllib.request.Request(url, headers=headers)
+
+    parser = scrapers.PageParser()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        # Bytes are decoded per chunk; a multi-byte character split between chunks is replaced,
+        # which never affects the ASCII tokens the parser looks for
+        while True:
+            chunk = response.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk.decode(charset, "replace"))
+    parser.close()
+    return {"stats": parser.stats, "level": parser.focumon_level}
+
+
+def _get_state():
+    # Stored on mw so cached stats survive add-on reloads
+    state = getattr(mw, "_lofi_stats", None)
+    if state is None:
+        # fetched_at is a time.monotonic() value, or None before the first fetch
+        state = {"data": None, "fetched_at": None, "pending": False, "error": None}
+        mw._lofi_stats = state
+    return state
+
+
+def is_enabled():
+    return bool(get_config().stats_url)
+
+
+def is_stale():
+    fetched_at = _get_state()["fetched_at"]
+    if fetched_at is None:
+        return True
+    try:
+        ttl = max(0, float(get_config().stats_ttl_minutes)) * 60
+    except (TypeError, ValueError):
+        ttl = DEFAULT_TTL_MINUTES * 60
+    return time.monotonic() - fetched_at >= ttl
+
+
+def get_cached_stats():
+    """
+    Return the last fetched stats (possibly stale) or None, never blocking.
+    Starts a background refresh when the cache has expired.
+    """
+    if not is_enabled():
+        return None
+    state = _get_state()
+    if is_stale() and not state["pending"]:
+        refresh()
+    return state["data"]
+
+
+def refresh(on_done=None):
+    """Fetch the stats on a worker thread; on_done(data) is called on the main thread."""
+    state = _get_state()
+    url = get_config().stats_url
+    if not url or state["pending"]:
+        return
+
+    state["pending"] = True
+
+    def start():
+        started = False
+        try:
+            cookie_header = get_cookie_jar().header_for(url)
+            mw.taskman.run_in_background(lambda: fetch_stats(url, cookie_header), finish)
+            started = True
+        finally:
+            if not started:
+                # Otherwise every later refresh would wait for a fetch that never runs
+                state["pending"] = False
+
+    def attach_and_start():
+        scheduled = False
+        try:
+            if get_cookie_jar().attached:
+                # Give the cookie store a moment to report the saved cookies
+                QTimer.singleShot(COOKIE_LOAD_DELAY_MS, start)
+            else:
+                start()
+            scheduled = True
+        finally:
+            if not scheduled:
+                state["pending"] = False
+
+    def finish(future):
+        state["pending"] = False
+        if get_config().stats_url != url:
+            # The URL changed while this fetch was running
+            return
+        # Stamped even on failure so a broken URL isn't retried on every render
+        state["fetched_at"] = time.monotonic()
+        try:
+            data = future.result()
+        except Exception as e:
+            state["error"] = str(e)
+            print(f"lofi.town: failed to fetch stats: {e}")
+            return
+
+        changed = data != state["data"]
+        state["data"] = data
+        state["error"] = None
+        if on_done:
+            on_done(data)
+        if changed:
+            from .deck_widget import update_widget
+            update_widget()
+
+    if getattr(mw, "_lofi_cookie_jar", None) is None:
+        # The jar needs the web profile, whose creation (cache cleanup, audio server, request
+        # filter) is kept out of the deck browser render that asked for the stats
+        QTimer.singleShot(0, attach_and_start)
+    else:
+        start()
+
+
+def expire():
+    """Mark the cached stats as stale; they are still shown until the next fetch completes."""
+    _get_state()["fetched_at"] = None
+
+
+def reset():
+    """Forget cached stats, e.g. after stats_url changes."""
+    state = _get_state()
+    state["data"] = None
+    state["error"] = None
+    expire()
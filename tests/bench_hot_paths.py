@@ -0,0 +1,197 @@
+"""
+Headless benchmark of the add-on's hot paths, using the stubbed aqt and Qt's offscreen platform.
+
+    python tests/bench_hot_paths.py          # table
+    python tests/bench_hot_paths.py --json   # machine-readable
+
+Sections:
+
+    widget     deck_widget.generate_html, and the deck browser render hook with a cold
+               (nothing cached) and warm (in-memory HTML reused) widget
+    dialogs    construction of every dialog, with a cold and a warm stylesheet cache
+    toggle     ToggleSwitch paint time (its own frame-time counter) over full on/off
+               animations, plus the first frame, which renders the sprites
+    reload     reload_utils.reload_changed with nothing changed and with every module forced,
+               and reload_modules as the Refresh button runs it
+    scrapers   scrapers.parse_page on a 1 MB page
+
+Dialogs, the toggle and reload_modules need PyQt6 (`pip install PyQt6`); without it they are reported
+as skipped. Dialogs are built but never shown: exec() returns immediately.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import timeit
+
+import fake_aqt
+
+ITERATIONS = 200
+RELOAD_ITERATIONS = 10
+TOGGLE_ANIMATIONS = 20
+DECK_COUNT = 50
+PAGE_MB = 1
+
+
+def per_call_ms(func, number):
+    return round(min(timeit.repeat(func, number=number, repeat=3)) / number * 1000, 4)
+
+
+def skip_reason():
+    if getattr(sys.modules["aqt.qt"], "QT_STUB", True):
+        return "PyQt6 is not installed"
+    return None
+
+
+def bench_widget():
+    from bench_widget_update import synthetic_tree
+    from aqt.deckbrowser import DeckBrowserContent
+
+    deck_widget = fake_aqt.import_submodule("deck_widget")
+    tree = synthetic_tree(DECK_COUNT)
+
+    def render(cold):
+        if cold:
+            deck_widget.reset_cache()
+            deck_widget._disk_cache = {}
+        content = DeckBrowserContent(tree=tree, stats="<div>stats</div>")
+        deck_widget.add_widget_to_deck_browser(None, content)
+
+    return {
+        "decks": DECK_COUNT,
+        "generate_html_ms": per_call_ms(deck_widget.generate_html, ITERATIONS),
+        "render_hook_cold_ms": per_call_ms(lambda: render(True), ITERATIONS),
+        "render_hook_warm_ms": per_call_ms(lambda: render(False), ITERATIONS),
+    }
+
+
+def bench_dialogs():
+    reason = skip_reason()
+    if reason:
+        return {"skipped": reason}
+
+    from bench_theme import bench_dialogs as bench_theme_dialogs
+
+    return bench_theme_dialogs(fake_aqt.import_submodule("theme"))
+
+
+def bench_toggle():
+    reason = skip_reason()
+    if reason:
+        return {"skipped": reason}
+
+    toggle_switch = fake_aqt.import_submodule("settings").ToggleSwitch
+    toggle_switch._sprites.clear()
+    toggle_switch.reset_frame_stats()
+    switch = toggle_switch()
+    # grab() runs paintEvent without showing the widget
+    switch.grab()
+    first_frame_ms = toggle_switch.frame_stats()["max_ms"]
+
+    toggle_switch.reset_frame_stats()
+    for _ in range(TOGGLE_ANIMATIONS):
+        for step in range(toggle_switch.STEPS + 1):
+            switch._position = step / toggle_switch.STEPS
+            switch.grab()
+    stats = toggle_switch.frame_stats()
+    return {
+        "first_frame_ms": round(first_frame_ms, 4),
+        "frames": stats["frames"],
+        "average_ms": round(stats["average_ms"], 4),
+        "max_ms": round(stats["max_ms"], 4),
+    }
+
+
+def bench_reload():
+    reload_utils = fake_aqt.import_submodule("reload_utils")
+    results = {
+        "modules": len(reload_utils.discover_modules()),
+        "unchanged_ms": per_call_ms(reload_utils.reload_changed, RELOAD_ITERATIONS),
+        "forced_ms": per_call_ms(lambda: reload_utils.reload_changed(force=True), RELOAD_ITERATIONS),
+    }
+
+    reason = skip_reason()
+    if reason:
+        results["reload_modules"] = {"skipped": reason}
+        return results
+
+    def refresh():
+        # Looked up on every call: the reload replaces the module that defines the dialog
+        fake_aqt.import_submodule("reload_utils").reload_modules(force=True)
+
+    results["reload_modules_ms"] = per_call_ms(refresh, RELOAD_ITERATIONS)
+    return results
+
+
+def bench_scrapers():
+    from bench_scrapers import make_page
+
+    scrapers = fake_aqt.import_submodule("scrapers")
+    page = make_page(PAGE_MB)
+    return {
+        "page_bytes": len(page),
+        "parse_page_ms": per_call_ms(lambda: scrapers.parse_page(page), 5),
+    }
+
+
+def main():
+    fake_aqt.load_addon()
+    qt = sys.modules["aqt.qt"]
+    if not getattr(qt, "QT_STUB", True):
+        # The info dialog shown by reload_modules would otherwise wait for a click
+        qt.QDialog.exec = lambda self: 0
+
+    # Keeps the add-on's own messages (e.g. the hook count after each reload) out of the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results = {
+            "qt": "stub" if getattr(qt, "QT_STUB", True) else f"PyQt6 ({os.environ.get('QT_QPA_PLATFORM')})",
+            "widget": bench_widget(),
+            "dialogs": bench_dialogs(),
+            "toggle": bench_toggle(),
+            "reload": bench_reload(),
+            "scrapers": bench_scrapers(),
+        }
+
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"qt: {results['qt']}")
+    widget = results["widget"]
+    print(f"widget ({widget['decks']} decks):")
+    print(f"    generate_html      {widget['generate_html_ms']:>9.4f} ms")
+    print(f"    render hook cold   {widget['render_hook_cold_ms']:>9.4f} ms")
+    print(f"    render hook warm   {widget['render_hook_warm_ms']:>9.4f} ms")
+
+    print("dialog construction:")
+    if "skipped" in results["dialogs"]:
+        print(f"    skipped: {results['dialogs']['skipped']}")
+    else:
+        for dialog, times in results["dialogs"].items():
+            print(f"    {dialog:<14} cold {times['cold_ms']:>8.3f} ms   warm {times['warm_ms']:>8.3f} ms")
+
+    toggle = results["toggle"]
+    print("toggle switch paint:")
+    if "skipped" in toggle:
+        print(f"    skipped: {toggle['skipped']}")
+    else:
+        print(f"    first frame        {toggle['first_frame_ms']:>9.4f} ms")
+        print(f"    {toggle['frames']} frames        avg {toggle['average_ms']:>7.4f} ms   max {toggle['max_ms']:>7.4f} ms")
+
+    reload = results["reload"]
+    print(f"reload ({reload['modules']} modules):")
+    print(f"    nothing changed    {reload['unchanged_ms']:>9.4f} ms")
+    print(f"    all modules        {reload['forced_ms']:>9.4f} ms")
+    if "reload_modules_ms" in reload:
+        print(f"    reload_modules     {reload['reload_modules_ms']:>9.4f} ms")
+    else:
+        print(f"    reload_modules     skipped: {reload['reload_modules']['skipped']}")
+
+    scrapers = results["scrapers"]
+    print(f"scrapers ({scrapers['page_bytes']} bytes):")
+    print(f"    parse_page         {scrapers['parse_page_ms']:>9.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
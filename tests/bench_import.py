@@ -0,0 +1,88 @@
+"""
+Measures what the add-on adds to Anki's startup, using a stubbed aqt.
+
+    python tests/bench_import.py          # table
+    python tests/bench_import.py --json   # machine-readable
+
+Runs a fresh interpreter with `-X importtime`, loads the add-on the way Anki does at startup,
+and reports the add-on modules that were imported, their import time, and the modules that
+are deferred until first use. "eager" additionally imports every module, which is what the
+add-on cost at startup before its entry points were made lazy.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {tests_dir!r})
+import fake_aqt
+fake_aqt.install()
+start = time.perf_counter()
+fake_aqt.load_addon()
+if {eager!r}:
+    import os
+    for name in sorted(os.listdir(fake_aqt.ADDON_DIR)):
+        if name.endswith(".py") and name != "__init__.py":
+            # __import__ goes through the C import path that -X importtime instruments
+            __import__(fake_aqt.ADDON_PACKAGE + "." + name[:-3])
+elapsed = time.perf_counter() - start
+loaded = sorted(name for name in sys.modules if name.startswith(fake_aqt.ADDON_PACKAGE + "."))
+print(json.dumps({{"elapsed_ms": elapsed * 1000, "loaded": loaded}}))
+"""
+
+
+def run(eager=False):
+    script = SCRIPT.format(tests_dir=TESTS_DIR, eager=eager)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # importtime lines look like: "import time:       123 |        456 |   package.module"
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue
+        name = parts[2]
+        if name.startswith("lofi_town."):
+            modules[name.split(".", 1)[1]] = {"self_us": int(parts[0]), "cumulative_us": int(parts[1])}
+
+    addon_dir = os.path.dirname(TESTS_DIR)
+    all_modules = sorted(name[:-3] for name in os.listdir(addon_dir)
+                         if name.endswith(".py") and name != "__init__.py")
+    loaded = [name.split(".", 1)[1] for name in report["loaded"]]
+
+    return {
+        "mode": "eager" if eager else "startup",
+        "elapsed_ms": round(report["elapsed_ms"], 3),
+        "modules": modules,
+        "deferred": [name for name in all_modules if name not in loaded],
+    }
+
+
+def main():
+    results = [run(eager=False), run(eager=True)]
+
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(f"{result['mode']}: {result['elapsed_ms']:.1f} ms")
+        for name, times in sorted(result["modules"].items(), key=lambda item: -item[1]["self_us"]):
+            print(f"    {name:<22} self {times['self_us']:>7} us   cumulative {times['cumulative_us']:>7} us")
+        if result["deferred"]:
+            print(f"    deferred: {', '.join(result['deferred'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark for scrapers.py over multi-megabyte page dumps.
+
+    python tests/bench_scrapers.py          # table
+    python tests/bench_scrapers.py --json   # machine-readable
+
+Pages are built from the test fixtures padded with filler markup (including near-miss
+"Trainer" and "badge" text) up to each size, with the stats at the end so every parser has
+to scan the whole page. Columns:
+
+    per_field     the previous approach: re.search with a pattern string per stat, plus findall
+    combined      one scan with a single alternation of all tokens
+    parse_page    scrapers.parse_page
+    chunked       the page fed to scrapers.PageParser in 64 KB chunks
+
+Constant ms/MB across sizes means linear time.
+"""
+
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scrapers
+from test_parsing import HTML_LEVEL, HTML_STATS
+
+SIZES_MB = [1, 2, 4, 8]
+CHUNK_SIZE = 64 * 1024
+
+FILLER = """
+<div class="flex justify-between px-1 font-serif">
+  <p>Trainer Rank</p><p class="opacity-50">Gold</p>
+  <div class="badge badge-outline">NEW</div>
+  <span class="text-sm">Loot table refreshed &middot; 12 minutes ago</span>
+</div>
+"""
+
+
+def per_field(html_content):
+    stats = {}
+    for label, key in scrapers.STAT_LABELS.items():
+        match = re.search(re.escape(label) + r'</p>\s*<p[^>]*>\s*([\d/]+)\s*</p>', html_content, re.DOTALL)
+        if match:
+            stats[key] = match.group(1).strip()
+    badges = re.findall(r'<div class="badge[^>]*">LV\.(\d+)</div>', html_content)
+    return stats, badges
+
+
+COMBINED_PATTERN = re.compile(
+    r'(?P<label>' + "|".join(re.escape(label) for label in scrapers.STAT_LABELS) + r')</p>\s*<p[^>]*>\s*(?P<value>[\d/]+)\s*</p>'
+    r'|<div class="badge[^>]*">LV\.(?P<level>\d+)</div>'
+)
+
+
+def combined(html_content):
+    stats, badges = {}, []
+    for match in COMBINED_PATTERN.finditer(html_content):
+        if match.group("level") is not None:
+            badges.append(match.group("level"))
+        else:
+            stats.setdefault(scrapers.STAT_LABELS[match.group("label")], match.group("value").strip())
+    return stats, badges
+
+
+def chunked(html_content):
+    parser = scrapers.PageParser()
+    for start in range(0, len(html_content), CHUNK_SIZE):
+        parser.feed(html_content[start:start + CHUNK_SIZE])
+    return parser.close()
+
+
+def make_page(size_mb):
+    tail = HTML_STATS + HTML_LEVEL
+    repeats = (size_mb * 1024 * 1024 - len(tail)) // len(FILLER)
+    return FILLER * repeats + tail
+
+
+def per_mb_ms(func, page, size_mb):
+    number = 3
+    return min(timeit.repeat(lambda: func(page), number=number, repeat=3)) / number * 1000 / size_mb
+
+
+def main():
+    results = {}
+    for size_mb in SIZES_MB:
+        page = make_page(size_mb)
+        assert scrapers.extract_stats(page) == per_field(page)[0]
+        results[f"{size_mb}MB"] = {
+            "per_field_ms_per_mb": round(per_mb_ms(per_field, page, size_mb), 3),
+            "combined_ms_per_mb": round(per_mb_ms(combined, page, size_mb), 3),
+            "parse_page_ms_per_mb": round(per_mb_ms(scrapers.parse_page, page, size_mb), 3),
+            "chunked_ms_per_mb": round(per_mb_ms(chunked, page, size_mb), 3),
+        }
+
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("ms per MB of HTML:")
+    for size, times in results.items():
+        print(
+            f"    {size:>5}   per field {times['per_field_ms_per_mb']:>7.3f}"
+            f"   combined {times['combined_ms_per_mb']:>7.3f}"
+            f"   parse_page {times['parse_page_ms_per_mb']:>7.3f}"
+            f"   chunked {times['chunked_ms_per_mb']:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Microbenchmark for dialog styling, using a stubbed aqt.
+
+    python tests/bench_theme.py          # table
+    python tests/bench_theme.py --json   # machine-readable
+
+"uncached" compiles every stylesheet from its template, like the dialogs did on each
+construction; "cached" is what every dialog after the first pays now. When PyQt6 is
+installed, dialog construction is timed too (offscreen), with a cold and a warm theme cache.
+"""
+
+import json
+import sys
+import timeit
+
+import fake_aqt
+
+ITERATIONS = 2000
+DIALOG_ITERATIONS = 20
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def bench_stylesheets(theme):
+    results = {}
+    for dialog in theme.TEMPLATES:
+        theme._compiled.clear()
+        results[dialog] = {
+            "uncached_us": round(per_call_us(lambda: theme.compile_stylesheet(dialog, "Silkscreen"), ITERATIONS), 2),
+            "cached_us": round(per_call_us(lambda: theme.get_stylesheet(dialog, "Silkscreen"), ITERATIONS), 2),
+        }
+    return results
+
+
+def bench_dialogs(theme):
+    qt = sys.modules["aqt.qt"]
+    if getattr(qt, "QT_STUB", True):
+        return {"skipped": "PyQt6 is not installed"}
+
+    mw = sys.modules["aqt"].mw
+    ui_utils = fake_aqt.import_submodule("ui_utils")
+    settings = fake_aqt.import_submodule("settings")
+    welcome_dialog = fake_aqt.import_submodule("welcome_dialog")
+    instructions_dialog = fake_aqt.import_submodule("instructions_dialog")
+    factories = {
+        "info": lambda: ui_utils.LofiInfoDialog("Benchmark", parent=mw.form.menuTools),
+        "settings": lambda: settings.LofiSettingsDialog(),
+        "welcome": lambda: welcome_dialog.WelcomeDialog(),
+        "instructions": lambda: instructions_dialog.InstructionsDialog(mw.form.menuTools),
+    }
+
+    def build(factory, clear_cache):
+        if clear_cache:
+            theme._compiled.clear()
+        factory().deleteLater()
+
+    results = {}
+    for dialog, factory in factories.items():
+        results[dialog] = {
+            "cold_ms": round(per_call_us(lambda: build(factory, True), DIALOG_ITERATIONS) / 1000, 3),
+            "warm_ms": round(per_call_us(lambda: build(factory, False), DIALOG_ITERATIONS) / 1000, 3),
+        }
+    return results
+
+
+def main():
+    theme = fake_aqt.import_submodule("theme")
+    results = {"stylesheets": bench_stylesheets(theme), "dialogs": bench_dialogs(theme)}
+
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("stylesheet build (per call):")
+    for dialog, times in results["stylesheets"].items():
+        print(f"    {dialog:<14} uncached {times['uncached_us']:>8.2f} us   cached {times['cached_us']:>6.2f} us")
+
+    print("dialog construction:")
+    if "skipped" in results["dialogs"]:
+        print(f"    skipped: {results['dialogs']['skipped']}")
+        return
+    for dialog, times in results["dialogs"].items():
+        print(f"    {dialog:<14} cold {times['cold_ms']:>8.3f} ms   warm {times['warm_ms']:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
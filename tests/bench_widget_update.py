@@ -0,0 +1,153 @@
+"""
+Compares a full deck browser refresh with an in-place widget update on a large collection.
+
+Inside Anki (use a throwaway profile), paste into the debug console (Ctrl+Shift+;):
+
+    exec(open("/path/to/addon/tests/bench_widget_update.py").read()); run_in_anki()
+
+This creates 5000 decks under "LofiBench", times mw.deckBrowser.refresh() against
+deck_widget.update_widget() (including the JS round trip), prints the results and deletes the
+decks again. Note that refresh() re-renders asynchronously, so its time only covers the Python
+side of building the page; the page itself still has to be parsed and laid out afterwards.
+
+Outside Anki, `python tests/bench_widget_update.py [--json]` compares what each path hands to
+the web view, using the stubbed aqt and a synthetic 5000-row deck tree: the page refresh()
+rebuilds (render hook plus the deck browser's body template) versus the update script. It
+reports the Python time and payload size of each; only run_in_anki() measures the browser
+parsing and laying out that payload, which is where refresh() spends its time.
+"""
+
+import json
+import sys
+import time
+import timeit
+
+DECK_COUNT = 5000
+PARENT_DECK = "LofiBench"
+ITERATIONS = 20
+
+# aqt.deckbrowser.DeckBrowser._body, which refresh() fills and passes to web.stdHtml()
+DECK_BROWSER_BODY = """
+<center>
+<table cellspacing=0 cellpadding=3>
+%(tree)s
+</table>
+
+<br>
+%(stats)s
+</center>
+"""
+
+
+def run_in_anki(deck_count=DECK_COUNT, iterations=5):
+    from aqt import mw
+
+    deck_widget = None
+    for name, module in sys.modules.items():
+        if name.endswith(".deck_widget") and hasattr(module, "update_widget"):
+            deck_widget = module
+            break
+    if deck_widget is None:
+        print("lofi.town deck widget is not loaded")
+        return
+
+    for i in range(deck_count):
+        mw.col.decks.id(f"{PARENT_DECK}::Deck {i:05d}")
+    mw.moveToState("deckBrowser")
+
+    results = {"decks": deck_count, "refresh_ms": [], "update_ms": []}
+
+    def time_refresh(remaining):
+        start = time.perf_counter()
+        mw.deckBrowser.refresh()
+        results["refresh_ms"].append((time.perf_counter() - start) * 1000)
+        if remaining > 1:
+            time_refresh(remaining - 1)
+        else:
+            time_update(iterations)
+
+    def time_update(remaining):
+        start = time.perf_counter()
+
+        def on_done(patched):
+            results["update_ms"].append((time.perf_counter() - start) * 1000)
+            if remaining > 1:
+                time_update(remaining - 1)
+            else:
+                finish()
+
+        deck_widget.update_widget(on_done)
+
+    def finish():
+        parent = mw.col.decks.id_for_name(PARENT_DECK)
+        if parent:
+            mw.col.decks.remove([parent])
+        mw.deckBrowser.refresh()
+        print(json.dumps({
+            "decks": results["decks"],
+            "refresh_ms": round(min(results["refresh_ms"]), 2),
+            "update_ms": round(min(results["update_ms"]), 2),
+        }, indent=2))
+
+    time_refresh(iterations)
+
+
+def synthetic_tree(deck_count):
+    row = (
+        "<tr class='deck' id='{id}'><td class=decktd colspan=5>"
+        "<a class=deck href=# onclick=\"return pycmd('open:{id}')\">Deck {i:05d}</a></td>"
+        "<td align=end><span class=new-count>0</span></td>"
+        "<td align=end><span class=learn-count>0</span></td>"
+        "<td align=end><span class=review-count>0</span></td></tr>"
+    )
+    return "".join(row.format(id=1000 + i, i=i) for i in range(deck_count))
+
+
+def run_headless():
+    import fake_aqt
+
+    fake_aqt.load_addon()
+    deck_widget = fake_aqt.import_submodule("deck_widget")
+    from aqt.deckbrowser import DeckBrowserContent
+
+    from aqt import mw
+
+    tree = synthetic_tree(DECK_COUNT)
+
+    def refresh_page():
+        content = DeckBrowserContent(tree=tree, stats="<div>stats</div>")
+        deck_widget.add_widget_to_deck_browser(None, content)
+        return DECK_BROWSER_BODY % {"tree": content.tree, "stats": content.stats}
+
+    def update_script():
+        deck_widget.update_widget()
+        return mw.deckBrowser.web.evals[-1]
+
+    def per_call_ms(func):
+        return min(timeit.repeat(func, number=ITERATIONS, repeat=3)) / ITERATIONS * 1000
+
+    # Warm the render cache so both paths reuse the same widget HTML
+    refresh_page()
+    return {
+        "decks": DECK_COUNT,
+        "refresh_ms": round(per_call_ms(refresh_page), 4),
+        "refresh_payload_bytes": len(refresh_page()),
+        "update_ms": round(per_call_ms(update_script), 4),
+        "update_payload_bytes": len(update_script()),
+    }
+
+
+def main():
+    results = run_headless()
+    if "--json" in sys.argv:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['decks']} decks, Python side and payload handed to the web view:")
+    print(f"    refresh   {results['refresh_ms']:>8.4f} ms   {results['refresh_payload_bytes']:>9} bytes of page HTML")
+    print(f"    update    {results['update_ms']:>8.4f} ms   {results['update_payload_bytes']:>9} bytes of script")
+    print("the browser parsing and laying out the payload is only measured by run_in_anki()")
+
+
+if __name__ == "__main__":
+    main()
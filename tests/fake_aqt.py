@@ -0,0 +1,346 @@
+"""
+Minimal stand-in for Anki's aqt package, so the add-on can be imported outside Anki.
+aqt.qt re-exports PyQt6 when it is installed, otherwise generic stub classes.
+
+Usage:
+    import fake_aqt
+    addon = fake_aqt.load_addon()
+"""
+
+import atexit
+import dataclasses
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+from concurrent.futures import Future
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_PACKAGE = "lofi_town"
+
+# Folders the add-on writes at runtime; the test copy of the add-on gets empty ones
+RUNTIME_FOLDERS = {"user_files", "user_data", "__pycache__", "tests", ".git"}
+
+# Names the add-on pulls from aqt.qt; the stub creates the rest on demand
+QT_NAMES = [
+    "QAbstractAnimation", "QAction", "QApplication", "QCheckBox", "QColor", "QDesktopServices",
+    "QDialog", "QEasingCurve", "QEvent", "QFont", "QFontDatabase", "QFrame", "QHBoxLayout",
+    "QImage", "QKeySequence", "QLabel", "QMainWindow", "QMenu", "QObject", "QPainter", "QPixmap", "QPointF",
+    "QPixmapCache", "QPushButton", "QRectF", "QScrollArea", "QTimer", "QUrl", "QVBoxLayout",
+    "QVariantAnimation", "QWebEnginePage", "QWebEngineProfile", "QWebEngineSettings",
+    "QWebEngineUrlRequestInterceptor", "QWebEngineView", "QWidget", "Qt", "pyqtSignal",
+]
+
+
+class _StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub()
+
+
+class _Stub(metaclass=_StubMeta):
+    """Accepts any call and returns another stub for any attribute."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub()
+
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+
+    def __or__(self, other):
+        return self
+
+    __and__ = __ror__ = __rand__ = __or__
+
+    def __invert__(self):
+        return self
+
+    def __bool__(self):
+        return False
+
+
+def _make_stub_qt():
+    module = types.ModuleType("aqt.qt")
+    classes = {}
+
+    def __getattr__(name):
+        if not name.startswith("Q") and name not in ("Qt", "pyqtSignal"):
+            raise AttributeError(name)
+        if name not in classes:
+            classes[name] = type(name, (_Stub,), {})
+        return classes[name]
+
+    module.__getattr__ = __getattr__
+    module.__all__ = list(QT_NAMES)
+    module.QT_STUB = True
+    return module
+
+
+def _make_real_qt():
+    """aqt.qt backed by PyQt6, using the offscreen platform. Returns None if PyQt6 is missing."""
+    try:
+        from PyQt6 import QtCore, QtGui, QtWidgets
+    except ImportError:
+        return None
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    module = types.ModuleType("aqt.qt")
+    for qt_module in (QtCore, QtGui, QtWidgets):
+        for name in dir(qt_module):
+            if not name.startswith("_"):
+                setattr(module, name, getattr(qt_module, name))
+    try:
+        from PyQt6 import QtWebEngineCore, QtWebEngineWidgets
+        for qt_module in (QtWebEngineCore, QtWebEngineWidgets):
+            for name in dir(qt_module):
+                if not name.startswith("_"):
+                    setattr(module, name, getattr(qt_module, name))
+    except ImportError:
+        pass
+
+    module.__all__ = [name for name in dir(module) if not name.startswith("_")]
+    module.QT_STUB = False
+    module.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    return module
+
+
+class Hook:
+    """Mimics an aqt.gui_hooks hook: a list of callbacks."""
+
+    def __init__(self, name):
+        self.name = name
+        self._hooks = []
+
+    def append(self, callback):
+        self._hooks.append(callback)
+
+    def remove(self, callback):
+        if callback in self._hooks:
+            self._hooks.remove(callback)
+
+    def count(self):
+        return len(self._hooks)
+
+    def __call__(self, *args):
+        for callback in list(self._hooks):
+            callback(*args)
+
+
+class FilterHook(Hook):
+    """Hook whose callbacks transform and return their first argument."""
+
+    def __call__(self, value, *args):
+        for callback in list(self._hooks):
+            value = callback(value, *args)
+        return value
+
+
+FILTER_HOOKS = {"webview_did_receive_js_message"}
+
+
+def _make_gui_hooks():
+    module = types.ModuleType("aqt.gui_hooks")
+    hooks = {}
+
+    def __getattr__(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name not in hooks:
+            hooks[name] = (FilterHook if name in FILTER_HOOKS else Hook)(name)
+        return hooks[name]
+
+    module.__getattr__ = __getattr__
+    module.all_hooks = hooks
+    return module
+
+
+class FakeAddonManager:
+    def __init__(self):
+        with open(os.path.join(ADDON_DIR, "config.json"), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.web_exports = {}
+        self.config_updated_actions = {}
+        self.writes = 0
+
+    def addonFromModule(self, module):
+        return module.split(".")[0]
+
+    def getConfig(self, module):
+        return dict(self.config)
+
+    def writeConfig(self, module, config):
+        self.config = dict(config)
+        self.writes += 1
+
+    def setWebExports(self, module, pattern):
+        self.web_exports[self.addonFromModule(module)] = pattern
+
+    def setConfigUpdatedAction(self, module, action):
+        self.config_updated_actions[self.addonFromModule(module)] = action
+
+
+class FakeProfileManager:
+    def __init__(self):
+        self.night = False
+
+    def night_mode(self):
+        return self.night
+
+
+class FakeTaskManager:
+    """Runs 'background' work immediately, which keeps benchmarks deterministic."""
+
+    def run_in_background(self, task, on_done=None, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(task())
+        except Exception as e:
+            future.set_exception(e)
+        if on_done:
+            on_done(future)
+        return future
+
+    def run_on_main(self, closure):
+        closure()
+
+
+class FakeWebView:
+    def __init__(self):
+        self.evals = []
+
+    def eval(self, js):
+        self.evals.append(js)
+
+    def evalWithCallback(self, js, callback):
+        # There is no page to patch outside Anki, which exercises the fallback path
+        self.evals.append(js)
+        callback(None)
+
+
+class FakeDeckBrowser:
+    def __init__(self):
+        self.refreshes = 0
+        self.web = FakeWebView()
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+class FakeMainWindow:
+    def __init__(self, qt):
+        self.setup(qt)
+
+    def setup(self, qt):
+        self.addonManager = FakeAddonManager()
+        self.pm = FakeProfileManager()
+        self.taskman = FakeTaskManager()
+        self.deckBrowser = FakeDeckBrowser()
+        self.state = "deckBrowser"
+        self.form = types.SimpleNamespace(menuTools=_Stub())
+        if not getattr(qt, "QT_STUB", True):
+            self.form.menuTools = qt.QMenu("Tools")
+
+    def devicePixelRatioF(self):
+        return 1.0
+
+
+def make_main_window(qt):
+    """
+    The fake mw. With real Qt it is an actual (never shown) QMainWindow, so menus, actions
+    and dialogs can use it as their parent the way they do in Anki.
+    """
+    if getattr(qt, "QT_STUB", True):
+        return FakeMainWindow(qt)
+
+    class QtFakeMainWindow(qt.QMainWindow):
+        def __init__(self):
+            super().__init__()
+            FakeMainWindow.setup(self, qt)
+
+    return QtFakeMainWindow()
+
+
+@dataclasses.dataclass
+class DeckBrowserContent:
+    tree: str = ""
+    stats: str = ""
+
+
+def install(force=False):
+    """Install the fake aqt modules into sys.modules and return the fake mw."""
+    if "aqt" in sys.modules and not force:
+        return sys.modules["aqt"].mw
+
+    qt = _make_real_qt() or _make_stub_qt()
+
+    aqt = types.ModuleType("aqt")
+    aqt.__path__ = []
+    aqt.qt = qt
+    aqt.gui_hooks = _make_gui_hooks()
+    aqt.mw = make_main_window(qt)
+
+    utils = types.ModuleType("aqt.utils")
+    utils.showInfo = lambda *args, **kwargs: None
+    aqt.utils = utils
+
+    deckbrowser = types.ModuleType("aqt.deckbrowser")
+    deckbrowser.DeckBrowser = FakeDeckBrowser
+    deckbrowser.DeckBrowserContent = DeckBrowserContent
+    aqt.deckbrowser = deckbrowser
+
+    sys.modules.update({
+        "aqt": aqt,
+        "aqt.qt": qt,
+        "aqt.gui_hooks": aqt.gui_hooks,
+        "aqt.utils": utils,
+        "aqt.deckbrowser": deckbrowser,
+    })
+    return aqt.mw
+
+
+def make_addon_folder():
+    """
+    Temporary add-on folder holding links to the real one's files, so user_files/ (widget
+    cache, logs, audio cache) and user_data/ written by tests stay out of the checkout, even
+    after modules are reloaded. Links keep the real sources, so edits are still picked up.
+    """
+    folder = tempfile.mkdtemp(prefix="lofi_town_")
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+    for name in os.listdir(ADDON_DIR):
+        if name in RUNTIME_FOLDERS or name.startswith("cache_trash"):
+            continue
+        os.symlink(os.path.join(ADDON_DIR, name), os.path.join(folder, name))
+    return folder
+
+
+def load_addon():
+    """Import the add-on folder as a package, the way Anki does at startup."""
+    install()
+    if ADDON_PACKAGE in sys.modules:
+        return sys.modules[ADDON_PACKAGE]
+
+    folder = make_addon_folder()
+    spec = importlib.util.spec_from_file_location(
+        ADDON_PACKAGE,
+        os.path.join(folder, "__init__.py"),
+        submodule_search_locations=[folder],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_submodule(name):
+    """Import one of the add-on's modules, e.g. 'deck_widget'."""
+    load_addon()
+    return importlib.import_module(f"{ADDON_PACKAGE}.{name}")
@@ -0,0 +1,229 @@
+import http.client
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+# Stand-ins for music tracks on the CDN
+TRACKS = {
+    "/music/track1.mp3": bytes(range(256)) * 400,
+    "/music/track2.mp3": b"\x02" * 60000,
+    "/music/track3.mp3": b"\x03" * 60000,
+    # Served without an audio extension; only recognized as the page's media load
+    "/music/stream": b"\x04" * 1000,
+    # Sent in two halves; the second only once the test has seen the first
+    "/music/slow.mp3": bytes(range(256)) * 600,
+}
+
+
+class AudioHandler(BaseHTTPRequestHandler):
+    hits = []
+    release_slow = threading.Event()
+
+    def do_GET(self):
+        AudioHandler.hits.append(self.path)
+        if self.path == "/music/live":
+            # A live stream: no Content-Length (it would never end on a real radio)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.end_headers()
+            self.wfile.write(b"\x05" * 1000)
+            return
+        body = TRACKS.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.path == "/music/slow.mp3":
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            AudioHandler.release_slow.wait(5)
+            body = body[len(body) // 2:]
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAudioCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.upstream = ThreadingHTTPServer(("127.0.0.1", 0), AudioHandler)
+        threading.Thread(target=cls.upstream.serve_forever, daemon=True).start()
+        # The cache never proxies loopback URLs, so address the stand-in CDN by another name
+        cls.base_url = f"http://lofi-cdn.test:{cls.upstream.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.upstream.shutdown()
+        cls.upstream.server_close()
+
+    def setUp(self):
+        self.audio_cache = fake_aqt.import_submodule("audio_cache")
+        self.real_download = self.audio_cache.download
+        self.folder = tempfile.mkdtemp()
+        patches = [
+            mock.patch.object(self.audio_cache, "cache_dir", lambda: self.folder),
+            # Resolve the stand-in CDN name to the local server
+            mock.patch.object(self.audio_cache, "download", self.download_from_local),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        AudioHandler.hits = []
+        AudioHandler.release_slow = threading.Event()
+        self.addCleanup(lambda: AudioHandler.release_slow.set())
+        self.server = self.audio_cache.AudioCacheServer(max_bytes=180000)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def download_from_local(self, url, path, max_bytes, on_length=None, on_chunk=None):
+        self.real_download(url.replace("lofi-cdn.test", "127.0.0.1"), path, max_bytes, on_length, on_chunk)
+
+    def raw_get(self, path):
+        """Request a path (or proxy URL) on the cache server without following redirects."""
+        path = path.split(str(self.server.port), 1)[-1]
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            return response.status, dict(response.headers)
+        finally:
+            connection.close()
+
+    def get(self, track, headers=None, media=False):
+        url = self.server.proxy_url(f"{self.base_url}{track}", media=media)
+        request = urllib.request.Request(url, headers=headers or {})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, dict(response.headers), response.read()
+
+    def test_second_play_is_served_from_disk(self):
+        status, headers, body = self.get("/music/track1.mp3")
+        self.assertEqual((status, body), (200, TRACKS["/music/track1.mp3"]))
+        self.assertEqual(headers["Access-Control-Allow-Origin"], "*")
+        self.assertEqual(headers["Content-Type"], "audio/mpeg")
+
+        _status, _headers, body = self.get("/music/track1.mp3")
+        self.assertEqual(body, TRACKS["/music/track1.mp3"])
+        self.assertEqual(AudioHandler.hits, ["/music/track1.mp3"])
+        self.assertEqual((self.server.stats["hits"], self.server.stats["misses"]), (1, 1))
+
+    def test_first_play_starts_before_the_download_ends(self):
+        track = TRACKS["/music/slow.mp3"]
+        path = self.audio_cache.cache_path(f"{self.base_url}/music/slow.mp3")
+        url = self.server.proxy_url(f"{self.base_url}/music/slow.mp3")
+        with urllib.request.urlopen(url, timeout=5) as response:
+            # The upstream holds back the second half until this read returns
+            first_half = response.read(len(track) // 2)
+            self.assertFalse(os.path.exists(path))
+            AudioHandler.release_slow.set()
+            self.assertEqual(first_half + response.read(), track)
+
+        self.assertTrue(os.path.exists(path))
+        _status, _headers, body = self.get("/music/slow.mp3")
+        self.assertEqual(body, track)
+        self.assertEqual(AudioHandler.hits, ["/music/slow.mp3"])
+
+    def test_range_requests(self):
+        track = TRACKS["/music/track1.mp3"]
+        status, headers, body = self.get("/music/track1.mp3", {"Range": "bytes=1000-1999"})
+        self.assertEqual(status, 206)
+        self.assertEqual(body, track[1000:2000])
+        self.assertEqual(headers["Content-Range"], f"bytes 1000-1999/{len(track)}")
+
+        _status, _headers, body = self.get("/music/track1.mp3", {"Range": "bytes=-10"})
+        self.assertEqual(body, track[-10:])
+
+    def test_least_recently_played_is_evicted(self):
+        self.get("/music/track1.mp3")
+        self.get("/music/track2.mp3")
+        # Replaying track1 makes track2 the oldest
+        os.utime(self.audio_cache.cache_path(f"{self.base_url}/music/track2.mp3"), (1, 1))
+        self.get("/music/track1.mp3")
+        self.get("/music/track3.mp3")
+
+        self.assertTrue(os.path.exists(self.audio_cache.cache_path(f"{self.base_url}/music/track1.mp3")))
+        self.assertFalse(os.path.exists(self.audio_cache.cache_path(f"{self.base_url}/music/track2.mp3")))
+        self.assertLessEqual(fake_aqt.import_submodule("cache_utils").cache_size(self.folder), 180000)
+
+    def test_extensionless_media_is_served(self):
+        with mock.patch.object(self.audio_cache.mw, "_lofi_audio_server", self.server, create=True):
+            url = self.audio_cache.proxy_url_for(f"{self.base_url}/music/stream", "ResourceTypeMedia")
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertEqual(response.read(), TRACKS["/music/stream"])
+
+        # Without the media flag the proxy can't tell it is audio
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            self.get("/music/stream")
+        self.assertEqual(error.exception.code, 400)
+
+    def test_only_redirected_urls_are_fetched(self):
+        url = f"{self.base_url}/music/track1.mp3"
+        proxy_url = self.server.proxy_url(url)
+        query = proxy_url.split("?", 1)[1]
+        # Right URL, but without the session token
+        self.assertEqual(self.raw_get(f"/a?{query}")[0], 404)
+
+        # Right token, but a URL the interceptor never redirected
+        other = urllib.parse.quote(f"{self.base_url}/music/track2.mp3", safe="")
+        self.assertEqual(self.raw_get(f"{self.server.path}?u={other}")[0], 404)
+        self.assertEqual(AudioHandler.hits, [])
+
+        self.assertEqual(self.raw_get(proxy_url)[0], 200)
+
+    def test_live_stream_is_played_from_the_source(self):
+        url = f"{self.base_url}/music/live"
+        with mock.patch.object(self.audio_cache.mw, "_lofi_audio_server", self.server, create=True), \
+                mock.patch("builtins.print"):
+            proxy_url = self.audio_cache.proxy_url_for(url, "ResourceTypeMedia")
+            status, headers = self.raw_get(proxy_url)
+            self.assertEqual((status, headers["Location"]), (307, url))
+            # Not redirected again, so the player's retry goes straight to the stream
+            self.assertIsNone(self.audio_cache.proxy_url_for(url, "ResourceTypeMedia"))
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_failed_download_is_played_from_the_source(self):
+        url = f"{self.base_url}/music/missing.mp3"
+        with mock.patch.object(self.audio_cache.mw, "_lofi_audio_server", self.server, create=True), \
+                mock.patch("builtins.print"):
+            status, headers = self.raw_get(self.audio_cache.proxy_url_for(url))
+            self.assertEqual((status, headers["Location"]), (307, url))
+            self.assertIn(url, self.server.uncacheable)
+            self.assertIsNone(self.audio_cache.proxy_url_for(url))
+
+    def test_remembered_urls_are_bounded(self):
+        with mock.patch.object(self.audio_cache, "MAX_REMEMBERED_URLS", 2):
+            for track in ("track1", "track2", "track1", "track3"):
+                self.server.proxy_url(f"{self.base_url}/music/{track}.mp3")
+        # track1 was redirected again after track2, so track2 is the one forgotten
+        self.assertEqual(
+            list(self.server.redirected), [f"{self.base_url}/music/track1.mp3", f"{self.base_url}/music/track3.mp3"]
+        )
+
+    def test_only_audio_is_proxied(self):
+        self.assertTrue(self.audio_cache.is_audio_url("https://cdn.lofi.town/a/b.MP3?x=1"))
+        self.assertTrue(self.audio_cache.is_audio_url("https://cdn.lofi.town/stream", "ResourceTypeMedia"))
+        self.assertFalse(self.audio_cache.is_audio_url("https://app.lofi.town/app.js"))
+        self.assertFalse(self.audio_cache.is_audio_url("http://127.0.0.1:1234/a.mp3"))
+        self.assertEqual(self.audio_cache.parse_range("bytes=5-", 10), (5, 9))
+        with self.assertRaises(ValueError):
+            self.audio_cache.parse_range("bytes=20-30", 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
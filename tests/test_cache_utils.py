@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache_utils
+
+
+def make_file(folder, name, size, age):
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+class TestCacheUtils(unittest.TestCase):
+    def test_prune_removes_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as folder:
+            oldest = make_file(folder, "a_0", 400, age=300)
+            middle = make_file(folder, "b_0", 400, age=200)
+            newest = make_file(folder, "c_0", 400, age=100)
+
+            removed_files, removed_bytes = cache_utils.prune_cache(folder, 900)
+
+            self.assertEqual((removed_files, removed_bytes), (1, 400))
+            self.assertFalse(os.path.exists(oldest))
+            self.assertTrue(os.path.exists(middle))
+            self.assertTrue(os.path.exists(newest))
+            self.assertEqual(cache_utils.cache_size(folder), 800)
+
+    def test_prune_skips_downloads_in_progress(self):
+        with tempfile.TemporaryDirectory() as folder:
+            downloading = make_file(folder, "a.mp3.part-1", 400, age=300)
+            leftover = make_file(folder, "b.mp3.part-2", 400, age=24 * 3600)
+
+            removed_files, _removed_bytes = cache_utils.prune_cache(folder, 0)
+
+            self.assertEqual(removed_files, 1)
+            self.assertTrue(os.path.exists(downloading))
+            self.assertFalse(os.path.exists(leftover))
+
+    def test_trash_is_renamed_then_deleted(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = os.path.join(folder, "cache_trash")
+            os.makedirs(os.path.join(cache, "nested"))
+            make_file(os.path.join(cache, "nested"), "blob", 250, age=0)
+
+            trash = cache_utils.move_to_trash(cache)
+
+            self.assertFalse(os.path.exists(cache))
+            self.assertEqual(cache_utils.find_trash(folder), [trash])
+
+            removed, removed_bytes, _elapsed = cache_utils.delete_paths([trash])
+
+            self.assertEqual((removed, removed_bytes), (1, 250))
+            self.assertEqual(cache_utils.find_trash(folder), [])
+            self.assertIsNone(cache_utils.move_to_trash(cache))
+
+    def test_cache_settings(self):
+        self.assertEqual(cache_utils.get_cache_settings(None), ("disk", 200 * 1024 * 1024))
+        self.assertEqual(cache_utils.get_cache_settings({"cache_mode": "memory", "cache_max_mb": 50}),
+                         ("memory", 50 * 1024 * 1024))
+        self.assertEqual(cache_utils.get_cache_settings({"cache_mode": "bogus", "cache_max_mb": "x"}),
+                         ("disk", 200 * 1024 * 1024))
+
+
+if __name__ == '__main__':
+    unittest.main()
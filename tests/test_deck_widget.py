@@ -0,0 +1,53 @@
+import importlib
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class TestDeckWidget(unittest.TestCase):
+    def setUp(self):
+        self.deck_widget = fake_aqt.import_submodule("deck_widget")
+        from aqt import gui_hooks
+        self.hooks = gui_hooks
+
+    def render(self):
+        from aqt.deckbrowser import DeckBrowserContent
+        content = DeckBrowserContent(tree="<tr></tr>", stats="<div>other add-on</div>")
+        self.hooks.deck_browser_will_render_content(None, content)
+        return content
+
+    def test_widget_added_once_per_render(self):
+        # A second copy of the hook (e.g. from an old module) must not add the widget again
+        self.hooks.deck_browser_will_render_content.append(self.deck_widget.add_widget_to_deck_browser)
+        try:
+            content = self.render()
+        finally:
+            self.hooks.deck_browser_will_render_content.remove(self.deck_widget.add_widget_to_deck_browser)
+        self.assertEqual(content.stats.count("id='lofi-widget-container'"), 1)
+
+    def test_each_render_gets_the_widget(self):
+        first = self.render()
+        second = self.render()
+        self.assertIn("lofi-widget-container", first.stats)
+        self.assertIn("lofi-widget-container", second.stats)
+        self.assertGreater(second._lofi_render_generation, first._lofi_render_generation)
+
+    def test_reinit_after_reload_does_not_duplicate_hooks(self):
+        render_hook = self.hooks.deck_browser_will_render_content
+        js_hook = self.hooks.webview_did_receive_js_message
+        counts = (render_hook.count(), js_hook.count())
+
+        module = importlib.reload(self.deck_widget)
+        module.init_deck_widget()
+        module.init_deck_widget()
+
+        self.assertEqual((render_hook.count(), js_hook.count()), counts)
+        self.assertIn(module.add_widget_to_deck_browser, render_hook._hooks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import importlib
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+RELOADS = 50
+RENDERS = 200
+
+
+class TestHookRegistry(unittest.TestCase):
+    def setUp(self):
+        fake_aqt.load_addon()
+        self.hook_registry = fake_aqt.import_submodule("hook_registry")
+        self.reload_utils = fake_aqt.import_submodule("reload_utils")
+        # Modules that register hooks at import
+        for name in ("theme", "dialog_pool", "settings", "deck_widget"):
+            fake_aqt.import_submodule(name)
+        from aqt import gui_hooks
+        self.hooks = gui_hooks
+
+    def installed_callbacks(self):
+        return {name: hook.count() for name, hook in self.hooks.all_hooks.items()}
+
+    def render_seconds(self):
+        from aqt.deckbrowser import DeckBrowserContent
+        start = time.perf_counter()
+        for _ in range(RENDERS):
+            self.hooks.deck_browser_will_render_content(None, DeckBrowserContent())
+        return time.perf_counter() - start
+
+    def reload_all(self):
+        self.reload_utils.reload_changed(force=True)
+        for name in ("theme", "dialog_pool"):
+            self.hook_registry.unregister_module(name)
+            importlib.reload(sys.modules[f"{fake_aqt.ADDON_PACKAGE}.{name}"])
+
+    def test_register_replaces_previous_copy(self):
+        hook = self.hooks.test_registry_hook
+
+        def callback():
+            pass
+
+        self.hook_registry.register(hook, callback)
+        self.hook_registry.register(hook, callback)
+        self.assertEqual(hook.count(), 1)
+        self.hook_registry.unregister(hook, callback)
+        self.assertEqual(hook.count(), 0)
+
+    def test_reload_keeps_hooks_constant(self):
+        self.reload_all()
+        count = self.hook_registry.hook_count()
+        callbacks = self.installed_callbacks()
+        baseline = min(self.render_seconds() for _ in range(3))
+
+        for _ in range(RELOADS):
+            self.reload_all()
+
+        self.assertEqual(self.hook_registry.hook_count(), count)
+        self.assertEqual(self.installed_callbacks(), callbacks)
+        self.assertEqual(self.hooks.deck_browser_will_render_content.count(), 1)
+        # 50 duplicated render hooks would make this ~50x slower; allow for timer noise
+        after = min(self.render_seconds() for _ in range(3))
+        self.assertLess(after, baseline * 3 + 0.005)
+
+    def test_unregister_module(self):
+        self.assertGreater(self.hook_registry.hook_count("dialog_pool"), 0)
+        self.hook_registry.unregister_module("dialog_pool")
+        self.assertEqual(self.hook_registry.hook_count("dialog_pool"), 0)
+        importlib.reload(sys.modules[f"{fake_aqt.ADDON_PACKAGE}.dialog_pool"])
+        self.assertEqual(self.hook_registry.hook_count("dialog_pool"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
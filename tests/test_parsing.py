@@ -1,6 +1,11 @@
-import re
+import os
+import sys
 import unittest
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import PageParser, extract_focumon_level, extract_stats
+
 # HTML Snippets provided by user
 HTML_STATS = """
 <div class="flex flex-col bg-retro-base-150 dark:bg-base-200 p-2 pb-4 rounded text-sm">
@@ -60,36 +65,6 @@ HTML_LEVEL = """
 </div>
 """
 
-def extract_stats(html_content):
-    stats = {}
-    
-    # Loot Collection
-    # Search for Loot Collection text, then find the next p tag with opacity-50
-    # Or just regex the structure loosely
-    loot_match = re.search(r'Loot Collection</p>\s*<p[^>]*>\s*([\d/]+)\s*</p>', html_content, re.DOTALL)
-    if loot_match:
-        stats['loot_collection'] = loot_match.group(1).strip()
-        
-    # Stamina
-    stamina_match = re.search(r'Trainer Stamina</p>\s*<p[^>]*>\s*([\d/]+)\s*</p>', html_content, re.DOTALL)
-    if stamina_match:
-        stats['stamina'] = stamina_match.group(1).strip()
-
-    # Trainer EXP
-    exp_match = re.search(r'Trainer EXP</p>\s*<p[^>]*>\s*([\d/]+)\s*</p>', html_content, re.DOTALL)
-    if exp_match:
-        stats['trainer_exp'] = exp_match.group(1).strip()
-
-    return stats
-
-def extract_focumon_level(html_content):
-    # Find all badges with LV.
-    badges = re.findall(r'<div class="badge[^>]*">LV\.(\d+)</div>', html_content)
-    if len(badges) >= 2:
-        # Assuming second badge is Focumon level based on user description
-        return badges[1]
-    return None
-
 class TestParsing(unittest.TestCase):
     def test_stats(self):
         stats = extract_stats(HTML_STATS)
@@ -101,5 +76,23 @@ class TestParsing(unittest.TestCase):
         level = extract_focumon_level(HTML_LEVEL)
         self.assertEqual(level, '17')
 
+    def test_chunked_feed_matches_single_scan(self):
+        html = HTML_STATS + HTML_LEVEL
+        for size in (1, 7, 64, 1000):
+            parser = PageParser()
+            for start in range(0, len(html), size):
+                parser.feed(html[start:start + size])
+            parser.close()
+            self.assertEqual(parser.stats, extract_stats(html))
+            self.assertEqual(parser.levels, ['36', '17'])
+
+    def test_first_occurrence_wins(self):
+        stats = extract_stats(HTML_STATS + HTML_STATS.replace('85/85', '10/85'))
+        self.assertEqual(stats.get('stamina'), '85/85')
+
+    def test_missing_fields(self):
+        self.assertEqual(extract_stats("<html></html>"), {})
+        self.assertIsNone(extract_focumon_level('<div class="badge">LV.3</div>'))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class TestPerfLog(unittest.TestCase):
+    def setUp(self):
+        self.perf_log = fake_aqt.import_submodule("perf_log")
+        self.perf_log.get_spans().clear()
+
+    def test_percentiles(self):
+        values = list(range(1, 101))
+        self.assertEqual(self.perf_log.percentile(values, 0.50), 50)
+        self.assertEqual(self.perf_log.percentile(values, 0.95), 95)
+        self.assertEqual(self.perf_log.percentile([7], 0.95), 7)
+        self.assertIsNone(self.perf_log.percentile([], 0.5))
+
+    def test_summary_per_span(self):
+        for ms in range(1, 21):
+            self.perf_log.record("render", ms / 1000)
+        self.perf_log.record("open", 0.5)
+        summary = self.perf_log.summarize()
+        self.assertEqual(summary["render"]["count"], 20)
+        self.assertEqual(summary["render"]["p50_ms"], 10)
+        self.assertEqual(summary["render"]["p95_ms"], 19)
+        self.assertEqual(summary["open"]["max_ms"], 500)
+
+    def test_ring_buffer_is_bounded(self):
+        for _ in range(self.perf_log.RING_SIZE + 50):
+            self.perf_log.record("render", 0.001)
+        self.assertEqual(len(self.perf_log.get_spans()), self.perf_log.RING_SIZE)
+
+    def test_timed_keeps_function_identity(self):
+        @self.perf_log.timed("work")
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(21), 42)
+        self.assertEqual(work.__qualname__.rsplit(".", 1)[-1], "work")
+        with self.perf_log.span("block", kind="test"):
+            pass
+        self.assertEqual([entry["span"] for entry in self.perf_log.get_spans()], ["work", "block"])
+        self.assertEqual(self.perf_log.get_spans()[-1]["kind"], "test")
+
+    def test_jsonl_only_when_enabled(self):
+        config = fake_aqt.import_submodule("config_service").get_config()
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "perf_log.jsonl")
+            with mock.patch.object(self.perf_log, "user_files_path", lambda *parts: path):
+                self.perf_log.record("render", 0.001)
+                self.assertFalse(os.path.exists(path))
+                config.update(perf_log=True)
+                try:
+                    self.perf_log.record("render", 0.002, ok=True)
+                finally:
+                    config.update(perf_log=False)
+            with open(path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual((entries[0]["ms"], entries[0]["ok"]), (2.0, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+LIFECYCLE_STATES = types.SimpleNamespace(Active="Active", Frozen="Frozen", Discarded="Discarded")
+
+
+class FakeSignal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+
+class FakePage:
+    """Refuses to freeze or discard while visible, like QtWebEngine does."""
+
+    def __init__(self):
+        self.visible = True
+        self.audible = False
+        self.state = LIFECYCLE_STATES.Active
+        self.scripts = []
+        self.loadFinished = FakeSignal()
+        self.recentlyAudibleChanged = FakeSignal()
+
+    def setLifecycleState(self, state):
+        if self.visible and state != LIFECYCLE_STATES.Active:
+            return
+        self.state = state
+
+    def lifecycleState(self):
+        return self.state
+
+    def recentlyAudible(self):
+        return self.audible
+
+    def setAudioMuted(self, muted):
+        self.muted = muted
+
+    def runJavaScript(self, js):
+        self.scripts.append(js)
+
+    def renderProcessPid(self):
+        return 0
+
+
+class TestPowerManager(unittest.TestCase):
+    def setUp(self):
+        self.power_manager = fake_aqt.import_submodule("power_manager")
+        patcher = mock.patch.object(
+            self.power_manager, "QWebEnginePage", types.SimpleNamespace(LifecycleState=LIFECYCLE_STATES)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        mw = sys.modules["aqt"].mw
+        self.addCleanup(setattr, mw, "state", mw.state)
+        mw.state = "deckBrowser"
+
+        from aqt.qt import QObject
+
+        class FakeWindow(QObject):
+            visible = True
+            minimized = False
+            active = True
+            exposed = True
+
+            def windowHandle(self):
+                return types.SimpleNamespace(isExposed=lambda: self.exposed)
+
+            def isVisible(self):
+                return self.visible
+
+            def isMinimized(self):
+                return self.minimized
+
+            def isActiveWindow(self):
+                return self.active
+
+        self.window = FakeWindow()
+        self.page = FakePage()
+        self.power = self.power_manager.PowerManager(self.window, self.page)
+        self.power.always_on_top = False
+
+    def hide(self, minimized=False):
+        self.window.active = False
+        if minimized:
+            self.window.minimized = True
+        else:
+            self.window.visible = False
+
+    def test_active_window_is_normal(self):
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+    def test_hidden_page_is_frozen_once_the_view_is_hidden(self):
+        self.hide()
+        # hideEvent runs before the web view is hidden: the freeze is refused
+        self.power.update()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Active)
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+
+        self.page.visible = False
+        self.power.update()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Frozen)
+        self.assertEqual(self.power.mode, self.power_manager.MODE_FROZEN)
+
+        self.window.visible = self.window.active = self.page.visible = True
+        self.power.update()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Active)
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+    def test_minimized_page_playing_music_is_throttled(self):
+        self.page.audible = True
+        self.hide(minimized=True)
+        self.page.visible = False
+        self.power.update()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Active)
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+        self.assertIn("__lofiRaf", self.page.scripts[-1])
+
+        # Music stopped: nothing left to keep running
+        self.page.audible = False
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_FROZEN)
+
+    def test_unfocused_visible_window_keeps_rendering(self):
+        # E.g. lofi.town beside Anki while reviewing
+        self.window.active = False
+        sys.modules["aqt"].mw.state = "review"
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+    def test_covered_window_is_throttled(self):
+        self.window.active = False
+        self.window.exposed = False
+        self.page.audible = True
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+
+        self.window.exposed = True
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+    def test_throttle_unfocused_review_and_always_on_top(self):
+        self.power.throttle_unfocused = True
+        self.window.active = False
+        self.power.always_on_top = True
+        self.power.update()
+        # Always on top and not reviewing: the window is probably being looked at
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+        sys.modules["aqt"].mw.state = "review"
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+
+        sys.modules["aqt"].mw.state = "deckBrowser"
+        self.power.always_on_top = False
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+
+    def test_disabled_stays_normal(self):
+        self.power.enabled = False
+        self.hide()
+        self.page.visible = False
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_NORMAL)
+
+    def test_suspended_page_is_frozen_then_discarded(self):
+        self.page.audible = True
+        self.power.suspend()
+        self.assertTrue(self.page.muted)
+        # Still visible: refused, and retried once hidden
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_THROTTLED)
+
+        self.hide()
+        self.page.visible = False
+        self.power.update()
+        self.assertEqual(self.power.mode, self.power_manager.MODE_FROZEN)
+
+        self.power._discard()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Discarded)
+        self.assertEqual(self.power.mode, self.power_manager.MODE_DISCARDED)
+
+        self.power.resume()
+        self.assertEqual(self.page.state, LIFECYCLE_STATES.Active)
+        self.assertFalse(self.page.muted)
+
+
+if __name__ == "__main__":
+    unittest.main()
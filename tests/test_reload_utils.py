@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class TestReloadUtils(unittest.TestCase):
+    def setUp(self):
+        self.reload_utils = fake_aqt.import_submodule("reload_utils")
+        self.ui_utils = fake_aqt.import_submodule("ui_utils")
+        self.names = self.reload_utils.discover_modules()
+        self.graph = self.reload_utils.build_graph(self.names)
+
+    def test_discovers_real_modules_only(self):
+        self.assertIn("deck_widget", self.names)
+        self.assertIn("welcome_dialog", self.names)
+        self.assertNotIn("__init__", self.names)
+        self.assertNotIn("stats_dialog", self.names)
+
+    def test_graph_only_has_load_time_imports(self):
+        self.assertTrue({"cache_utils", "config_service", "hook_registry"} <= self.graph["deck_widget"])
+        # instructions_dialog only imports the window inside a function
+        self.assertNotIn("main", self.graph["instructions_dialog"])
+
+    def test_dependents_reload_after_their_dependencies(self):
+        fake_aqt.import_submodule("settings")
+        order = self.reload_utils.reload_order({"theme"}, self.graph)
+        self.assertIn("settings", order)
+        self.assertLess(order.index("theme"), order.index("settings"))
+        self.assertNotIn("cache_utils", order)
+
+    def test_touched_file_is_not_changed(self):
+        snapshot = self.reload_utils.take_snapshot(self.names)
+        mtime, size, digest = snapshot["theme"]
+        snapshot["theme"] = (mtime - 1, size, digest)
+        self.assertEqual(self.reload_utils.changed_modules(self.names), set())
+
+        snapshot["theme"] = (mtime - 1, size, "0" * 40)
+        self.assertEqual(self.reload_utils.changed_modules(self.names), {"theme"})
+
+    def test_startup_snapshot_is_hashed(self):
+        mw = sys.modules["aqt"].mw
+        mw._lofi_reload_snapshot = None
+        fake_aqt.load_addon().snapshot_modules()
+        snapshot = mw._lofi_reload_snapshot
+        mtime, size, digest = snapshot["theme"]
+        self.assertIsNotNone(digest)
+        snapshot["theme"] = (mtime - 1, size, digest)
+        self.assertNotIn("theme", self.reload_utils.changed_modules(self.names))
+
+        # A second profile_did_open keeps the first baseline
+        fake_aqt.load_addon().snapshot_modules()
+        self.assertIs(mw._lofi_reload_snapshot, snapshot)
+
+    def test_unchanged_tree_reloads_nothing(self):
+        # Startup snapshot: stat only, no hashes
+        sys.modules["aqt"].mw._lofi_reload_snapshot = None
+        self.reload_utils.take_snapshot(self.names, hash_files=False)
+        with mock.patch.object(self.ui_utils, "show_custom_info") as show, mock.patch("builtins.print"):
+            self.reload_utils.reload_modules()
+        self.assertIn("No changes to reload", show.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
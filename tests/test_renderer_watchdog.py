@@ -0,0 +1,226 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class FakeSignal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+
+class FakePage:
+    def __init__(self, pid):
+        self.pid = pid
+        self.renderProcessTerminated = FakeSignal()
+
+    def renderProcessPid(self):
+        return self.pid
+
+
+class FakeUrl:
+    def __init__(self, text):
+        self.text = text
+
+    def isValid(self):
+        return bool(self.text)
+
+    def toString(self):
+        return self.text
+
+
+class FakeWebEnginePage(FakePage):
+    """Stands in for QWebEnginePage(profile, parent) when the watchdog builds a replacement."""
+
+    def __init__(self, profile=None, parent=None):
+        super().__init__(0)
+        self.profile = profile
+        self.loadFinished = FakeSignal()
+        self.loaded_url = None
+        self.muted = False
+        self.deleted = False
+
+    def url(self):
+        return self.loaded_url
+
+    def setUrl(self, url):
+        self.loaded_url = url
+
+    def setAudioMuted(self, muted):
+        self.muted = muted
+
+    def deleteLater(self):
+        self.deleted = True
+
+
+class TestRendererWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.watchdog = fake_aqt.import_submodule("renderer_watchdog")
+        self.process_utils = fake_aqt.import_submodule("process_utils")
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def test_backoff_doubles_and_resets(self):
+        backoff = self.watchdog.Backoff()
+        delays = [backoff.next_delay(now=0) for _ in range(5)]
+        self.assertEqual(delays, [0, 5, 10, 20, 40])
+        for _ in range(20):
+            backoff.next_delay(now=0)
+        self.assertEqual(backoff.next_delay(now=0), self.watchdog.BACKOFF_MAX_SECONDS)
+        # Quiet for long enough: start over
+        self.assertEqual(backoff.next_delay(now=backoff.last + self.watchdog.BACKOFF_RESET_SECONDS + 1), 0)
+
+    def test_event_log_is_trimmed(self):
+        log = self.watchdog.EventLog(os.path.join(self.folder.name, "log.jsonl"), max_bytes=2000)
+        for i in range(100):
+            log.append("memory", index=i)
+        events = log.read()
+        self.assertLess(os.path.getsize(log.path), 2000)
+        self.assertEqual(events[-1]["index"], 99)
+        self.assertEqual(events[-1]["event"], "memory")
+
+    @unittest.skipUnless(os.path.isdir("/proc/self"), "needs /proc")
+    def test_rss_of_current_process(self):
+        rss = self.process_utils.rss_bytes(os.getpid())
+        self.assertGreater(rss, 1024 * 1024)
+        self.assertIsNone(self.process_utils.rss_bytes(0))
+
+    @unittest.skipUnless(os.path.isdir("/proc/self"), "needs /proc")
+    def test_memory_ceiling_and_crash_schedule_recycle(self):
+        if self.watchdog.QWebEnginePage is None:
+            self.skipTest("needs QtWebEngine")
+        config = fake_aqt.import_submodule("config_service").get_config()
+        from aqt.qt import QObject
+        window = QObject()
+        window.power = types.SimpleNamespace(suspended=False)
+        page = FakePage(os.getpid())
+        watchdog = self.watchdog.RendererWatchdog(window, page)
+        watchdog.log = self.watchdog.EventLog(os.path.join(self.folder.name, "log.jsonl"))
+
+        config.update(renderer_max_mb=0)
+        watchdog.check()
+        self.assertEqual(watchdog.log.read(), [])
+
+        config.update(renderer_max_mb=1)
+        try:
+            watchdog.check()
+        finally:
+            config.update(renderer_max_mb=1500)
+        self.assertEqual([event["event"] for event in watchdog.log.read()], ["memory"])
+
+        # A normal exit (e.g. a discarded page) isn't a crash
+        crashed = page.renderProcessTerminated.slots[0]
+        crashed(types.SimpleNamespace(name="NormalTerminationStatus"), 0)
+        crashed(types.SimpleNamespace(name="CrashedTerminationStatus"), 11)
+        events = watchdog.log.read()
+        self.assertEqual([event["event"] for event in events], ["memory", "crash"])
+        self.assertEqual(events[1]["exit_code"], 11)
+        self.assertEqual(events[1]["delay_s"], 5)
+
+
+
+class TestPageRecycle(unittest.TestCase):
+    def setUp(self):
+        self.watchdog = fake_aqt.import_submodule("renderer_watchdog")
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+        self.created = []
+
+        def make_page(profile, parent):
+            page = FakeWebEnginePage(profile, parent)
+            self.created.append(page)
+            return page
+
+        self.configure_page = mock.Mock()
+        patches = [
+            mock.patch.object(self.watchdog, "QWebEnginePage", make_page),
+            mock.patch.object(self.watchdog.profile_manager, "get_profile", lambda: "lofi profile"),
+            mock.patch.object(self.watchdog.profile_manager, "configure_page", self.configure_page),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        from aqt.qt import QObject
+
+        class FakeWindow(QObject):
+            def __init__(self):
+                super().__init__()
+                self.replaced = []
+
+            def replace_page(self, page):
+                self.replaced.append(page)
+
+        self.window = FakeWindow()
+        self.old_page = FakeWebEnginePage()
+        self.old_page.loaded_url = FakeUrl("https://app.lofi.town/room")
+        self.recycler = self.watchdog.RendererWatchdog(self.window, self.old_page)
+        self.recycler.log = self.watchdog.EventLog(os.path.join(self.folder.name, "log.jsonl"))
+
+    def start_recycle(self):
+        self.recycler.schedule_recycle("memory")
+        # What the recycle timer does when it fires
+        self.recycler._recycle_timer.stop()
+        self.recycler._start_recycle()
+        self.assertEqual(len(self.created), 1)
+        return self.created[0]
+
+    def events(self):
+        return [event["event"] for event in self.recycler.log.read()]
+
+    def test_replacement_is_loaded_off_screen_then_swapped_in(self):
+        page = self.start_recycle()
+        # Loading on the shared profile, muted and not shown yet
+        self.assertEqual(page.profile, "lofi profile")
+        self.configure_page.assert_called_once_with(page)
+        self.assertTrue(page.muted)
+        self.assertEqual(page.loaded_url.toString(), "https://app.lofi.town/room")
+        self.assertIs(self.recycler.pending_page, page)
+        self.assertEqual(self.window.replaced, [])
+
+        page.loadFinished.slots[0](True)
+
+        self.assertEqual(self.window.replaced, [page])
+        self.assertIs(self.recycler.page, page)
+        self.assertIsNone(self.recycler.pending_page)
+        self.assertEqual(page.loadFinished.slots, [])
+        self.assertTrue(self.old_page.muted)
+        self.assertTrue(self.old_page.deleted)
+        # Crashes of the new page are now the ones watched
+        self.assertEqual(self.old_page.renderProcessTerminated.slots, [])
+        self.assertEqual(len(page.renderProcessTerminated.slots), 1)
+        self.assertEqual(self.recycler.recycles, 1)
+        self.assertEqual(self.events(), ["memory", "recycled"])
+
+    def test_failed_load_keeps_the_current_page(self):
+        page = self.start_recycle()
+
+        page.loadFinished.slots[0](False)
+
+        self.assertEqual(self.window.replaced, [])
+        self.assertIs(self.recycler.page, self.old_page)
+        self.assertIsNone(self.recycler.pending_page)
+        self.assertTrue(page.deleted)
+        self.assertFalse(self.old_page.deleted)
+        self.assertEqual(self.recycler.recycles, 0)
+        # Retried later, after a longer delay
+        events = self.recycler.log.read()
+        self.assertEqual(self.events(), ["memory", "recycle_failed", "memory"])
+        self.assertEqual(events[-1]["delay_s"], self.watchdog.BACKOFF_BASE_SECONDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
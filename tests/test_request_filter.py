@@ -0,0 +1,90 @@
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class FakeRequestInfo:
+    def __init__(self, url, resource_type="ResourceTypeScript"):
+        host = url.split("://", 1)[-1].split("/", 1)[0]
+        self._url = types.SimpleNamespace(host=lambda: host, toString=lambda: url)
+        self._type = types.SimpleNamespace(name=resource_type)
+        self.blocked = False
+        self.redirected = False
+
+    def requestUrl(self):
+        return self._url
+
+    def resourceType(self):
+        return self._type
+
+    def block(self, value):
+        self.blocked = value
+
+    def redirect(self, url):
+        self.redirected = True
+
+
+class TestDomainBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.request_filter = fake_aqt.import_submodule("request_filter")
+
+    def test_matches_domain_and_subdomains(self):
+        blocklist = self.request_filter.DomainBlocklist(["doubleclick.net", ".Hotjar.com "])
+        self.assertTrue(blocklist.matches("doubleclick.net"))
+        self.assertTrue(blocklist.matches("stats.g.doubleclick.net"))
+        self.assertTrue(blocklist.matches("script.hotjar.com"))
+        self.assertFalse(blocklist.matches("notdoubleclick.net"))
+        self.assertFalse(blocklist.matches("app.lofi.town"))
+        self.assertFalse(blocklist.matches(""))
+
+    def test_config_controls_defaults(self):
+        config = fake_aqt.import_submodule("config_service").get_config()
+        config.update(block_trackers=False, blocklist=["ads.example.com"])
+        try:
+            blocklist = self.request_filter.build_blocklist(config)
+            self.assertEqual(len(blocklist), 1)
+            self.assertTrue(blocklist.matches("cdn.ads.example.com"))
+        finally:
+            config.update(block_trackers=True, blocklist=[])
+        self.assertTrue(self.request_filter.build_blocklist(config).matches("www.google-analytics.com"))
+
+    def test_interceptor_blocks_and_counts(self):
+        interceptor = self.request_filter.LofiRequestInterceptor()
+        requests = [
+            FakeRequestInfo("https://www.googletagmanager.com/gtag/js"),
+            FakeRequestInfo("https://region1.google-analytics.com/g/collect", "ResourceTypePing"),
+            FakeRequestInfo("https://app.lofi.town/assets/app.js"),
+            # The page itself is never blocked
+            FakeRequestInfo("https://doubleclick.net/", "ResourceTypeMainFrame"),
+        ]
+        for info in requests:
+            interceptor.interceptRequest(info)
+
+        self.assertEqual([info.blocked for info in requests], [True, True, False, False])
+        self.assertEqual(interceptor.stats.blocked, 2)
+        self.assertEqual(interceptor.stats.estimated_bytes, 60 * 1024 + 512)
+
+    def test_audio_is_redirected_to_the_cache(self):
+        mw = fake_aqt.install()
+        mw._lofi_audio_server = types.SimpleNamespace(
+            proxy_url=lambda url, media=False: f"http://127.0.0.1:1/a?u={url}", uncacheable=set()
+        )
+        try:
+            interceptor = self.request_filter.LofiRequestInterceptor()
+            track = FakeRequestInfo("https://cdn.lofi.town/music/track.mp3", "ResourceTypeMedia")
+            script = FakeRequestInfo("https://app.lofi.town/assets/app.js")
+            interceptor.interceptRequest(track)
+            interceptor.interceptRequest(script)
+        finally:
+            mw._lofi_audio_server = None
+        self.assertTrue(track.redirected)
+        self.assertFalse(script.redirected)
+
+
+if __name__ == "__main__":
+    unittest.main()
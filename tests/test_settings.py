@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+
+
+class TestToggleSwitch(unittest.TestCase):
+    def setUp(self):
+        fake_aqt.install()
+        if getattr(sys.modules["aqt.qt"], "QT_STUB", True):
+            self.skipTest("needs PyQt6 to paint")
+        self.theme = fake_aqt.import_submodule("theme")
+        self.toggle_switch = fake_aqt.import_submodule("settings").ToggleSwitch
+        self.toggle_switch._sprites.clear()
+        self.toggle_switch._is_dark = None
+        self.toggle_switch.reset_frame_stats()
+        self.addCleanup(self.toggle_switch._sprites.clear)
+        self.addCleanup(setattr, self.toggle_switch, "_is_dark", None)
+
+    def paint_animation(self, switch):
+        for step in range(self.toggle_switch.STEPS + 1):
+            switch._position = step / self.toggle_switch.STEPS
+            # Runs paintEvent without showing the widget
+            switch.grab()
+
+    def test_sprites_rendered_once_per_theme_and_ratio(self):
+        render = mock.patch.object(self.toggle_switch, "render_sprites", wraps=self.toggle_switch.render_sprites)
+        with render as render_sprites, mock.patch.object(self.theme, "is_dark", return_value=False):
+            first, second = self.toggle_switch(), self.toggle_switch()
+            self.paint_animation(first)
+            self.paint_animation(second)
+            self.assertEqual(render_sprites.call_count, 1)
+            self.assertEqual(list(self.toggle_switch._sprites), [(False, first.devicePixelRatioF())])
+
+        with render as render_sprites, mock.patch.object(self.theme, "is_dark", return_value=True):
+            self.toggle_switch.on_theme_change()
+            self.paint_animation(first)
+            self.assertEqual(render_sprites.call_count, 1)
+            self.assertEqual(
+                set(self.toggle_switch._sprites),
+                {(False, first.devicePixelRatioF()), (True, first.devicePixelRatioF())},
+            )
+
+        frames = 3 * (self.toggle_switch.STEPS + 1)
+        self.assertEqual(self.toggle_switch.frame_stats()["frames"], frames)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_aqt
+from test_parsing import HTML_LEVEL, HTML_STATS
+
+
+class StatsPageHandler(BaseHTTPRequestHandler):
+    """Serves the parsing fixtures as the stats page and records the Cookie headers it gets."""
+
+    requests = []
+
+    def do_GET(self):
+        StatsPageHandler.requests.append(self.headers.get("Cookie"))
+        if self.path != "/stats":
+            self.send_error(404)
+            return
+        body = (HTML_STATS + HTML_LEVEL).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestStatsFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StatsPageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.mw = fake_aqt.install()
+        self.stats_fetcher = fake_aqt.import_submodule("stats_fetcher")
+        self.deck_widget = fake_aqt.import_submodule("deck_widget")
+        self.config = fake_aqt.import_submodule("config_service").get_config()
+
+        # A jar that isn't attached to a web profile, with the login cookie already loaded
+        jar = self.stats_fetcher.CookieJar()
+        jar.add("session", "abc123", "127.0.0.1")
+        jar.add("other_site", "nope", "example.com")
+        self.mw._lofi_cookie_jar = jar
+
+        # Changing the URL already refreshes the widget, which fetches once
+        self.config.update(stats_url=f"{self.base_url}/stats", stats_ttl_minutes=10)
+        self.stats_fetcher.reset()
+        StatsPageHandler.requests = []
+
+    def tearDown(self):
+        self.config.update(stats_url="")
+
+    def test_fetch_parses_page_and_sends_cookies(self):
+        data = self.stats_fetcher.fetch_stats(f"{self.base_url}/stats", "session=abc123")
+        self.assertEqual(data["stats"], {"loot_collection": "0/6", "stamina": "85/85", "trainer_exp": "273/360"})
+        self.assertEqual(data["level"], "17")
+        self.assertEqual(StatsPageHandler.requests, ["session=abc123"])
+
+    def test_cookie_header_matches_domain_and_path(self):
+        jar = self.stats_fetcher.CookieJar()
+        jar.add("a", "1", ".lofi.town")
+        jar.add("b", "2", "app.lofi.town", "/api")
+        jar.add("c", "3", "lofi.town", secure=True)
+        self.assertEqual(jar.header_for("https://app.lofi.town/"), "a=1; c=3")
+        self.assertEqual(jar.header_for("https://app.lofi.town/api/me"), "a=1; b=2; c=3")
+        self.assertEqual(jar.header_for("http://app.lofi.town/"), "a=1")
+        self.assertEqual(jar.header_for("https://notlofi.town/"), "")
+
+    def test_cached_until_ttl_expires(self):
+        # The fake task manager runs the fetch immediately
+        first = self.stats_fetcher.get_cached_stats()
+        second = self.stats_fetcher.get_cached_stats()
+        self.assertEqual(first["stats"]["stamina"], "85/85")
+        self.assertIs(first, second)
+        self.assertEqual(StatsPageHandler.requests, ["session=abc123"])
+
+        self.stats_fetcher.expire()
+        self.stats_fetcher.get_cached_stats()
+        self.assertEqual(len(StatsPageHandler.requests), 2)
+
+    def test_stale_right_after_boot(self):
+        # time.monotonic() counts from boot, so it can be smaller than the TTL
+        with mock.patch.object(self.stats_fetcher.time, "monotonic", return_value=120.0):
+            self.assertTrue(self.stats_fetcher.is_stale())
+            self.stats_fetcher.get_cached_stats()
+            self.assertFalse(self.stats_fetcher.is_stale())
+            self.stats_fetcher.expire()
+            self.assertTrue(self.stats_fetcher.is_stale())
+            self.stats_fetcher.get_cached_stats()
+        self.assertEqual(len(StatsPageHandler.requests), 2)
+
+    def test_first_render_does_not_create_the_profile(self):
+        profile_manager = fake_aqt.import_submodule("profile_manager")
+        self.mw._lofi_cookie_jar = None
+        timers = []
+        with mock.patch.object(self.stats_fetcher.QTimer, "singleShot", lambda ms, func: timers.append(func)), \
+                mock.patch.object(profile_manager, "is_supported", return_value=False):
+            self.assertIsNone(self.stats_fetcher.get_cached_stats())
+            self.assertIsNone(self.mw._lofi_cookie_jar)
+            self.assertEqual(StatsPageHandler.requests, [])
+
+            # Later, from the event loop
+            timers.pop()()
+        self.assertIsNotNone(self.mw._lofi_cookie_jar)
+        self.assertEqual(self.stats_fetcher.get_cached_stats()["stats"]["stamina"], "85/85")
+        self.assertEqual(len(StatsPageHandler.requests), 1)
+
+    def test_invalid_ttl_falls_back_to_default(self):
+        self.stats_fetcher.get_cached_stats()
+        self.config.update(stats_ttl_minutes="ten")
+        try:
+            self.assertFalse(self.stats_fetcher.is_stale())
+            from aqt.deckbrowser import DeckBrowserContent
+            content = DeckBrowserContent()
+            self.deck_widget.add_widget_to_deck_browser(None, content)
+            self.assertIn("85/85", content.stats)
+        finally:
+            self.config.update(stats_ttl_minutes=10)
+
+    def test_failed_start_does_not_stay_pending(self):
+        self.mw._lofi_cookie_jar = None
+        timers = []
+        with mock.patch.object(self.stats_fetcher.QTimer, "singleShot", lambda ms, func: timers.append(func)), \
+                mock.patch.object(self.stats_fetcher, "get_cookie_jar", side_effect=RuntimeError("no profile")):
+            self.stats_fetcher.refresh()
+            self.assertTrue(self.mw._lofi_stats["pending"])
+            with self.assertRaises(RuntimeError):
+                timers.pop()()
+        self.assertFalse(self.mw._lofi_stats["pending"])
+
+    def test_failed_fetch_keeps_previous_stats(self):
+        data = self.stats_fetcher.get_cached_stats()
+        self.config.update(stats_url=f"{self.base_url}/missing")
+        self.mw._lofi_stats["data"] = data
+        self.stats_fetcher.get_cached_stats()
+        self.assertIs(self.mw._lofi_stats["data"], data)
+        self.assertIsNotNone(self.mw._lofi_stats["error"])
+
+    def test_widget_renders_cached_stats(self):
+        from aqt.deckbrowser import DeckBrowserContent
+        content = DeckBrowserContent()
+        self.deck_widget.add_widget_to_deck_browser(None, content)
+        self.assertIn("85/85", content.stats)
+        self.assertIn("<b>LV</b> 17", content.stats)
+
+    def test_disabled_without_url(self):
+        self.config.update(stats_url="")
+        self.assertIsNone(self.stats_fetcher.get_cached_stats())
+        self.assertEqual(StatsPageHandler.requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
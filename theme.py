@@ -0,0 +1,368 @@
+"""
+Shared lofi.town palette and the compiled stylesheets of the add-on's dialogs.
+Each stylesheet is built once per (theme, dialog, font) and reused by every later dialog.
+With the "app_stylesheet" option the rules are instead installed once on the application,
+scoped to the dialogs' object names, so Qt doesn't parse a stylesheet per dialog.
+"""
+
+from aqt import mw, gui_hooks
+from aqt.qt import QApplication
+import re
+from string import Template
+
+from . import hook_registry
+from .config_service import get_config
+
+LIGHT_PALETTE = {
+    "bg": "#F9F7E4",
+    "text": "#7D593A",
+    "accent": "#DCE597",
+    "accent_text": "#7D593A",
+    "accent_hover": "#ECF5A7",
+    "button": "#DCE597",
+    "button_text": "#7D593A",
+    "button_hover": "#ECF5A7",
+    "secondary": "#B48555",
+    "section_bg": "#FFFFFF",
+    "link": "#B48555",
+    "toggle_off": "#E5D09D",
+}
+
+DARK_PALETTE = dict(
+    LIGHT_PALETTE,
+    bg="#7D593A",
+    text="#F9F7E4",
+    button="#B48555",
+    button_text="#FFFFFF",
+    button_hover="#C49565",
+    section_bg="#68482E",
+    link="#DCE597",
+    toggle_off="#3A3A3A",
+)
+
+INFO_TEMPLATE = Template("""
+    QDialog {
+        background-color: $bg;
+    }
+    QLabel {
+        color: $text;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    }
+    QLabel#title {
+        font-family: '$font', monospace;
+        font-size: 20px;
+        color: $text;
+        margin-bottom: 12px;
+        letter-spacing: -0.5px;
+    }
+    QLabel#message {
+        font-size: 14px;
+        line-height: 1.5;
+        color: $text;
+    }
+    QPushButton {
+        background-color: $accent;
+        color: $accent_text;
+        border: none;
+        border-radius: 18px; /* Pill shape */
+        padding: 8px 32px;
+        font-size: 14px;
+        font-weight: 700;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        min-height: 20px;
+    }
+    QPushButton:hover {
+        background-color: $accent_hover;
+    }
+    QPushButton:pressed {
+        background-color: #CCEB87;
+        padding-top: 9px; /* Pressed effect */
+        padding-bottom: 7px;
+    }
+    QPushButton:focus {
+        outline: none;
+    }
+""")
+
+SETTINGS_TEMPLATE = Template("""
+    QDialog {
+        background-color: $bg;
+    }
+    QLabel {
+        font-size: 14px;
+        color: $text;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    }
+    QLabel.section-title {
+        font-size: 16px;
+        font-weight: 600;
+        color: $text;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        padding: 4px 0px;
+    }
+    QPushButton {
+        background-color: $secondary;
+        color: #FFFFFF;
+        border: none;
+        border-radius: 8px;
+        padding: 10px 20px;
+        font-size: 14px;
+        font-weight: 600;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+    }
+    QPushButton:hover {
+        background-color: #C49565;
+    }
+    QPushButton:pressed {
+        background-color: #A47545;
+    }
+    QPushButton#reportBtn {
+        background-color: #E5D09D;
+        color: #7D593A;
+        border-radius: 18px;
+        padding: 0px 16px;
+        font-size: 13px;
+        font-weight: 600;
+        min-height: 36px;
+        max-height: 36px;
+    }
+    QPushButton#reportBtn:hover {
+        background-color: #F5E0AD;
+    }
+    QPushButton#donateBtn {
+        background-color: $accent;
+        color: #7D593A;
+        border: none;
+        border-radius: 18px;
+        padding: 0px 16px;
+        font-size: 13px;
+        font-weight: 600;
+        min-height: 36px;
+        max-height: 36px;
+    }
+    QPushButton#donateBtn:hover {
+        background-color: #ECF5A7;
+    }
+    QPushButton#saveBtn {
+        background-color: $accent;
+        color: #7D593A;
+    }
+    QPushButton#saveBtn:hover {
+        background-color: #ECF5A7;
+    }
+    QPushButton#saveBtn:pressed {
+        background-color: #CCEB87;
+    }
+""")
+
+WELCOME_TEMPLATE = Template("""
+    QDialog {
+        background-color: $bg;
+    }
+    QPushButton {
+        background-color: $button;
+        color: $button_text;
+        border: none;
+        border-radius: 25px;
+        padding: 12px 40px;
+        font-size: 15px;
+        font-weight: 700;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        min-height: 26px;
+        max-height: 26px;
+    }
+    QPushButton:hover {
+        background-color: $button_hover;
+    }
+    QPushButton:pressed {
+        background-color: #CCEB87;
+    }
+    QPushButton:focus {
+        outline: none;
+    }
+    QPushButton.secondary {
+        background-color: transparent;
+        color: $text;
+        border: 2px solid $button;
+        border-radius: 20px;
+        padding: 8px 30px;
+        font-size: 13px;
+        font-weight: 600;
+        min-height: 20px;
+        max-height: 20px;
+    }
+    QPushButton.secondary:hover {
+        background-color: $button;
+        color: $button_text;
+    }
+    QCheckBox {
+        color: $text;
+        font-size: 13px;
+        spacing: 8px;
+    }
+    QCheckBox::indicator {
+        width: 18px;
+        height: 18px;
+        border-radius: 4px;
+        border: 2px solid $button;
+    }
+    QCheckBox::indicator:checked {
+        background-color: $button;
+        border: 2px solid $button;
+    }
+    QCheckBox::indicator:checked::after {
+        content: "✓";
+        color: $button_text;
+        font-size: 14px;
+        font-weight: bold;
+    }
+""")
+
+INSTRUCTIONS_TEMPLATE = Template("""
+    QDialog {
+        background-color: $bg;
+    }
+    QLabel {
+        color: $text;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        line-height: 1.5;
+    }
+    QLabel.h1 {
+        font-family: '$font', monospace;
+        font-size: 20px;
+        color: $text;
+        margin-bottom: 15px;
+    }
+    QLabel.h2 {
+        font-family: '$font', monospace;
+        font-size: 16px;
+        color: $text;
+        margin-top: 0px;
+        margin-bottom: 8px;
+    }
+    QLabel.body {
+        font-size: 14px;
+        color: $text;
+    }
+    QFrame.section {
+        background-color: $section_bg;
+        border-radius: 12px;
+        padding: 15px;
+        margin-bottom: 10px;
+    }
+    QPushButton {
+        background-color: $button;
+        color: $button_text;
+        border: 1px solid $button;
+        border-radius: 20px; /* Pill shape */
+        padding: 0px 24px;
+        font-size: 14px;
+        font-weight: 700;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        min-height: 40px;
+        max-height: 40px;
+    }
+    QPushButton:hover {
+        background-color: $button_hover;
+        border-color: $button_hover;
+    }
+    QScrollArea {
+        border: none;
+        background-color: transparent;
+    }
+    QWidget#scrollContent {
+        background-color: transparent;
+    }
+""")
+
+TEMPLATES = {
+    "info": INFO_TEMPLATE,
+    "settings": SETTINGS_TEMPLATE,
+    "welcome": WELCOME_TEMPLATE,
+    "instructions": INSTRUCTIONS_TEMPLATE,
+}
+
+# Object names the app-wide stylesheet is scoped to
+OBJECT_NAMES = {
+    "info": "lofiInfoDialog",
+    "settings": "lofiSettingsDialog",
+    "welcome": "lofiWelcomeDialog",
+    "instructions": "lofiInstructionsDialog",
+}
+
+APP_STYLESHEET_MARKER = "/* lofi.town */"
+
+# Compiled stylesheets, keyed by (is_dark, dialog, font)
+_compiled = {}
+_app_fonts = {}
+
+
+def is_dark():
+    return mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
+
+
+def get_palette():
+    return DARK_PALETTE if is_dark() else LIGHT_PALETTE
+
+
+def compile_stylesheet(dialog, font="", dark=None):
+    """Build a dialog's stylesheet from its template (uncached)."""
+    palette = DARK_PALETTE if (is_dark() if dark is None else dark) else LIGHT_PALETTE
+    return TEMPLATES[dialog].substitute(palette, font=font)
+
+
+def get_stylesheet(dialog, font=""):
+    """Return a dialog's stylesheet for the current theme, compiling it only once."""
+    key = (is_dark(), dialog, font)
+    stylesheet = _compiled.get(key)
+    if stylesheet is None:
+        stylesheet = _compiled[key] = compile_stylesheet(dialog, font, key[0])
+    return stylesheet
+
+
+def scope_stylesheet(stylesheet, object_name):
+    """Restrict every rule of a dialog stylesheet to the dialog with the given object name."""
+    def scope_rule(match):
+        selectors = []
+        for selector in match.group(1).split(","):
+            selector = selector.strip()
+            if selector.startswith("QDialog"):
+                selectors.append(f"QDialog#{object_name}{selector[len('QDialog'):]}")
+            else:
+                selectors.append(f"#{object_name} {selector}")
+        return "\n" + ", ".join(selectors) + " {"
+
+    return re.sub(r"([^{}]+?)\s*\{", scope_rule, stylesheet)
+
+
+def install_app_stylesheet():
+    """(Re)install the dialog rules on the application, replacing any earlier copy."""
+    app = QApplication.instance()
+    base = app.styleSheet().split(APP_STYLESHEET_MARKER)[0]
+    rules = [
+        scope_stylesheet(get_stylesheet(dialog, font), OBJECT_NAMES[dialog])
+        for dialog, font in _app_fonts.items()
+    ]
+    app.setStyleSheet(base + APP_STYLESHEET_MARKER + "\n".join(rules))
+
+
+def apply_stylesheet(widget, dialog, font=""):
+    """Style a dialog, either with its own cached stylesheet or through the app stylesheet."""
+    widget.setObjectName(OBJECT_NAMES[dialog])
+
+    if not get_config().app_stylesheet:
+        widget.setStyleSheet(get_stylesheet(dialog, font))
+        return
+
+    if _app_fonts.get(dialog) != font:
+        _app_fonts[dialog] = font
+        install_app_stylesheet()
+
+
+def on_theme_change():
+    """Anki replaces the app stylesheet on theme changes, so put the dialog rules back."""
+    if _app_fonts:
+        install_app_stylesheet()
+
+
+hook_registry.register(gui_hooks.theme_did_change, on_theme_change)
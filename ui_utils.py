@@ -1,7 +1,6 @@
 from aqt import mw
 from aqt.qt import *
-import os
-from . import font_utils
+from . import dialog_pool, font_utils, image_utils, theme
 
 class LofiInfoDialog(QDialog):
     """
@@ -22,92 +21,34 @@ class LofiInfoDialog(QDialog):
         self.title_font = font_utils.load_custom_font("Silkscreen-Regular.ttf")
         
         self.setup_ui()
+
+    def rebind(self, text, title="lofi.town", parent=None, type="info"):
+        """Show new content in this (pooled) dialog without rebuilding it."""
+        self.text_content = text
+        self.title_content = title
+        self.dialog_type = type
+
+        parent = parent or mw
+        if self.parent() is not parent:
+            # setParent resets the window flags, so pass the current ones along
+            self.setParent(parent, self.windowFlags())
+
+        self.title_label.setText(title.upper())
+        self.msg_label.setText(text)
+        self.adjustSize()
         
     def setup_ui(self):
-        # Detect theme
-        is_dark = mw.pm.night_mode() if hasattr(mw.pm, 'night_mode') else False
-        
-        # Modern Color Palette
-        if is_dark:
-            bg_color = "#7D593A"
-            text_color = "#F9F7E4"
-            btn_bg = "#DCE597" # Accent Green
-            btn_text = "#7D593A" # Brown Text
-            btn_hover = "#ECF5A7"
-        else:
-            bg_color = "#F9F7E4"
-            text_color = "#7D593A"
-            btn_bg = "#DCE597"
-            btn_text = "#7D593A"
-            btn_hover = "#ECF5A7"
-
         # Stylesheet
-        self.setStyleSheet(f"""
-            QDialog {{
-                background-color: {bg_color};
-            }}
-            QLabel {{
-                color: {text_color};
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-            }}
-            QLabel#title {{
-                font-family: '{self.title_font}', monospace;
-                font-size: 20px;
-                color: {text_color};
-                margin-bottom: 12px;
-                letter-spacing: -0.5px;
-            }}
-            QLabel#message {{
-                font-size: 14px;
-                line-height: 1.5;
-                color: {text_color};
-            }}
-            QPushButton {{
-                background-color: {btn_bg};
-                color: {btn_text};
-                border: none;
-                border-radius: 18px; /* Pill shape */
-                padding: 8px 32px;
-                font-size: 14px;
-                font-weight: 700;
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                min-height: 20px;
-            }}
-            QPushButton:hover {{
-                background-color: {btn_hover};
-            }}
-            QPushButton:pressed {{
-                background-color: #CCEB87;
-                padding-top: 9px; /* Pressed effect */
-                padding-bottom: 7px;
-            }}
-            QPushButton:focus {{
-                outline: none;
-            }}
-        """)
+        theme.apply_stylesheet(self, "info", self.title_font)
         
         layout = QVBoxLayout()
         layout.setContentsMargins(35, 20, 35, 25)
         layout.setSpacing(0)
         layout.addStretch()
-        # Helper to load image
-        addon_dir = os.path.dirname(__file__)
-        img_path = os.path.join(addon_dir, "assets", "lofi_town_logo.png")
-        if os.path.exists(img_path):
+        # Logo, scaled for High DPI and cached across dialogs
+        scaled_pixmap = image_utils.get_pixmap("lofi_town_logo.png", width=100, ratio=self.devicePixelRatioF())
+        if scaled_pixmap:
             img_label = QLabel()
-            
-            # High DPI Scaling Logic
-            pixmap = QPixmap(img_path)
-            pixel_ratio = self.devicePixelRatioF()
-            target_width = 100
-            
-            # Scale to (target_width * pixel_ratio)
-            scaled_w = int(target_width * pixel_ratio)
-            scaled_pixmap = pixmap.scaledToWidth(scaled_w, Qt.TransformationMode.SmoothTransformation)
-            
-            # Set device pixel ratio so it renders at logical size
-            scaled_pixmap.setDevicePixelRatio(pixel_ratio)
-            
             img_label.setPixmap(scaled_pixmap)
             img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             layout.addWidget(img_label)
@@ -116,21 +57,21 @@ class LofiInfoDialog(QDialog):
 
         
         # Title
-        title_label = QLabel(self.title_content.upper())
-        title_label.setObjectName("title")
-        title_label.setWordWrap(True)
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(title_label)
+        self.title_label = QLabel(self.title_content.upper())
+        self.title_label.setObjectName("title")
+        self.title_label.setWordWrap(True)
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.title_label)
         layout.addSpacing(15)
         
         # Message
-        msg_label = QLabel(self.text_content)
-        msg_label.setObjectName("message")
-        msg_label.setWordWrap(True)
-        msg_label.setTextFormat(Qt.TextFormat.RichText)
-        msg_label.setOpenExternalLinks(True)
-        msg_label.setAlignment(Qt.AlignmentFlag.AlignCenter) # Center text for modern feel
-        layout.addWidget(msg_label)
+        self.msg_label = QLabel(self.text_content)
+        self.msg_label.setObjectName("message")
+        self.msg_label.setWordWrap(True)
+        self.msg_label.setTextFormat(Qt.TextFormat.RichText)
+        self.msg_label.setOpenExternalLinks(True)
+        self.msg_label.setAlignment(Qt.AlignmentFlag.AlignCenter) # Center text for modern feel
+        layout.addWidget(self.msg_label)
         
         layout.addSpacing(5)
         layout.addStretch()
@@ -153,7 +94,7 @@ class LofiInfoDialog(QDialog):
 
 def show_custom_info(text, title="lofi.town", parent=None, type="info"):
     """
-    Helper to show the custom dialog.
+    Helper to show the custom dialog, reusing the pooled instance when possible.
     """
-    d = LofiInfoDialog(text, title, parent, type)
+    d = dialog_pool.get_dialog(LofiInfoDialog, text, title, parent, type)
     d.exec()